@@ -0,0 +1,298 @@
+from multicall import MULTICALL3_ADDRESS, Multicall, WalletState
+from typing import Dict, Any, List, Optional, Set
+from client import Client, make_w3
+from odos import ODOS_API_URL, SLIPPAGE_PERCENT, Odos, PreflightError, SwapError
+from route_planner import RouteSearch
+from odos_scheduler import odos_scheduler
+from quote_cache import quote_cache
+from proxy_pool import ProxyPool
+from wallet_store import WalletStore
+from signer import ProcessSigner
+from results import ResultsWriter
+from metrics import wallet_stages
+from journal import Journal
+from termcolor import cprint
+import contextlib
+import asyncio
+import time
+import sys
+import os
+
+
+class BatchStats:
+    def __init__(self, total: int, label: str = "Всего") -> None:
+        self.label = label
+        self.total = total
+        self.success = 0
+        self.failed = 0
+        self.skipped = 0
+        self.in_flight = 0
+        # Потрачено на газ в wei нативного токена сети
+        self.gas_spent = 0
+        self.started_at = time.monotonic()
+
+    # Сводная статистика по нескольким сетям
+    @classmethod
+    def merged(cls, parts: List["BatchStats"]) -> "BatchStats":
+        stats = cls(sum(part.total for part in parts))
+        stats.success = sum(part.success for part in parts)
+        stats.failed = sum(part.failed for part in parts)
+        stats.skipped = sum(part.skipped for part in parts)
+        stats.in_flight = sum(part.in_flight for part in parts)
+        stats.started_at = min((part.started_at for part in parts), default=stats.started_at)
+        return stats
+
+    @property
+    def done(self) -> int:
+        return self.success + self.failed + self.skipped
+
+    # Скорость обработки кошельков
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def success_rate(self) -> float:
+        finished = self.success + self.failed
+        return self.success / finished if finished else 0.0
+
+    def summary(self) -> str:
+        return (f"📊 {self.label}: {self.done}/{self.total} | ✅ {self.success} | ❌ {self.failed} | "
+                f"⛔ {self.skipped} | {self.rate():.2f} кошельков/сек")
+
+
+class BatchRunner:
+    def __init__(self, amount: float, proxy_pool: ProxyPool, max_concurrent_wallets: int = 50,
+                 max_concurrent_per_network: int = 20, pipeline: bool = False,
+                 max_price_impact: Optional[float] = None, network_limits: Optional[Dict[str, int]] = None,
+                 journal: Optional[Journal] = None, api_url: str = ODOS_API_URL,
+                 signer: Optional[ProcessSigner] = None, preflight: bool = False,
+                 route_splits: Optional[List[int]] = None, route_alternates: bool = False,
+                 slippage: float = SLIPPAGE_PERCENT, results: Optional[ResultsWriter] = None,
+                 quiet: bool = False, progress_interval: float = 5) -> None:
+        self.amount = amount
+        self.pipeline = pipeline
+        self.max_price_impact = max_price_impact
+        self.proxy_pool = proxy_pool
+        self.progress_interval = progress_interval
+        self.max_concurrent_per_network = max_concurrent_per_network
+        self.network_limits = network_limits or {}
+        self.journal = journal
+        self.api_url = api_url
+        self.signer = signer
+        self.preflight = preflight
+        self.route_splits = route_splits or [1]
+        self.route_alternates = route_alternates
+        self.slippage = slippage
+        self.results = results
+        self.quiet = quiet
+        self.wallet_semaphore = asyncio.Semaphore(max_concurrent_wallets)
+        self.network_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.stats: Dict[str, BatchStats] = {}
+        # Сети, для которых уже предупредили об отсутствии альтернативных выходных токенов
+        self.no_alternates: Set[str] = set()
+
+    # Семафор сети создаётся при первом обращении
+    def get_network_semaphore(self, network: str) -> asyncio.Semaphore:
+        if network not in self.network_semaphores:
+            limit = self.network_limits.get(network, self.max_concurrent_per_network)
+            self.network_semaphores[network] = asyncio.Semaphore(limit)
+        return self.network_semaphores[network]
+
+    # Поиск маршрута выключен, если нет ни деления суммы, ни альтернативных выходных токенов
+    def route_search(self, network: str, network_data: Dict[str, Any]) -> Optional[RouteSearch]:
+        to_addresses = [network_data["to_address"]]
+        if self.route_alternates:
+            alternates = network_data.get("alternate_to_addresses", [])
+            if not alternates and network not in self.no_alternates:
+                self.no_alternates.add(network)
+                cprint(f"⚠️ {network}: route_alternates включён, но в networks_data.json нет "
+                       f"alternate_to_addresses, свап идёт только в основной токен", "light_yellow")
+            to_addresses += alternates
+        if self.route_splits == [1] and len(to_addresses) == 1:
+            return None
+        return RouteSearch(self.route_splits, to_addresses)
+
+    def make_client(self, network_data: Dict[str, Any], private_key: str, address: str,
+                    proxy: Optional[str]) -> Client:
+        return Client(
+            router_address=network_data["router_address"],
+            from_address=network_data["from_address"],
+            explorer_url=network_data["explorer_url"],
+            to_address=network_data["to_address"],
+            private_key=private_key,
+            chain_id=network_data["chain_id"],
+            rpc_urls=network_data["rpc_urls"],
+            amount=self.amount,
+            proxy=proxy,
+            multicall_address=network_data.get("multicall_address", MULTICALL3_ADDRESS),
+            signer=self.signer,
+            address=address,
+            proxy_pool=self.proxy_pool,
+        )
+
+    # Полный цикл свапа для одного кошелька
+    async def run_wallet(self, network: str, network_data: Dict[str, Any], private_key: str, address: str,
+                         state: Optional[WalletState] = None) -> bool:
+        stats = self.stats[network]
+        wallet_journal = self.journal.wallet(network, address) if self.journal else None
+        if wallet_journal is not None and wallet_journal.is_done("swap"):
+            stats.success += 1
+            self.write_result({"network": network, "address": address, "status": "done_before"})
+            return True
+
+        # Сначала лимит сети, потом общий: ждущая сеть не занимает общие слоты
+        async with self.get_network_semaphore(network), self.wallet_semaphore:
+            client = None
+            odos = None
+            error: Optional[Exception] = None
+            stages: Dict[str, float] = {}
+            token = wallet_stages.set(stages)
+            stats.in_flight += 1
+            started = time.monotonic()
+            try:
+                client = self.make_client(network_data, private_key, address, self.proxy_pool.assign(address))
+                odos = Odos(client, self.max_price_impact, self.proxy_pool, wallet_journal, self.api_url,
+                            self.preflight, self.route_search(network, network_data), self.slippage)
+                success = await (odos.execute_pipelined(state) if self.pipeline else odos.execute(state))
+            except PreflightError as e:
+                cprint(f"{self._label(client)} {e}", "light_yellow")
+                success, error = False, e
+            except SwapError as e:
+                cprint(f"{self._label(client)} {e}", "light_red")
+                success, error = False, e
+            except Exception as e:
+                cprint(f"{self._label(client)} ❌ Непредвиденная ошибка: {e}", "light_red")
+                success, error = False, e
+            finally:
+                stats.in_flight -= 1
+                wallet_stages.reset(token)
+
+            if isinstance(error, PreflightError):
+                status = "skipped"
+                stats.skipped += 1
+            elif success:
+                status = "success"
+                stats.success += 1
+            else:
+                status = "failed"
+                stats.failed += 1
+            gas_used, gas_spent = client.gas_spent() if client is not None else (0, 0)
+            stats.gas_spent += gas_spent
+            self.write_result({
+                "network": network,
+                "address": address,
+                "status": status,
+                # Этапы оборачивают сбой в SwapError, поэтому класс ошибки берётся у исходной причины
+                "error": type(error.__cause__ or error).__name__ if error is not None else None,
+                "message": str(error) if error is not None else None,
+                "transactions": [{"stage": stage, "tx_hash": tx_hash}
+                                 for stage, tx_hash in (odos.transactions if odos is not None else [])],
+                "gas_used": gas_used,
+                "gas_spent": gas_spent,
+                "amount_in": str(odos.amount_in) if odos is not None else "0",
+                "amount_out": str(odos.amount_out) if odos is not None else "0",
+                "duration": round(time.monotonic() - started, 3),
+                "stages": {stage: round(duration, 4) for stage, duration in stages.items()},
+            })
+            return success
+
+    # Итог кошелька в файл результатов, если он включён
+    def write_result(self, record: Dict[str, Any]) -> None:
+        if self.results is not None:
+            self.results.write({"ts": round(time.time(), 3), **record})
+
+    @staticmethod
+    def _label(client: Optional[Client]) -> str:
+        return f"[{client.address}]" if client else "[?]"
+
+    # Предварительное чтение состояния всех кошельков через Multicall3
+    async def read_states(self, network: str, network_data: Dict[str, Any],
+                          addresses: List[str]) -> Dict[str, WalletState]:
+        w3 = make_w3(network_data["rpc_urls"], self.proxy_pool.best(), self.proxy_pool)
+        multicall = Multicall(w3, network_data.get("multicall_address", MULTICALL3_ADDRESS))
+        try:
+            return await multicall.read_wallet_states(
+                network_data["from_address"], network_data["router_address"], addresses)
+        except Exception as e:
+            cprint(f"⚠️ {network}: не удалось прочитать состояние кошельков через Multicall3: {e}", "light_yellow")
+            return {}
+
+    # Ориентировочная котировка для отчёта, из общего кэша
+    async def report_quote(self, network: str, network_data: Dict[str, Any], private_key: str,
+                           address: str) -> None:
+        client = self.make_client(network_data, private_key, address, self.proxy_pool.best())
+        try:
+            quote = await Odos(client, proxy_pool=self.proxy_pool, api_url=self.api_url).preview_quote()
+            out_amount = client.from_wei_main(int(quote["outAmounts"][0]), 18)
+        except (SwapError, KeyError, IndexError, ValueError) as e:
+            cprint(f"⚠️ {network}: не удалось получить ориентировочную котировку: {e}", "light_yellow")
+            return
+        cprint(f"📈 {network}: {self.amount} → ~{out_amount:.4f} (priceImpact {quote.get('priceImpact')}%)",
+               "light_cyan")
+
+    def print_stats(self) -> None:
+        for stats in self.stats.values():
+            cprint(stats.summary(), "light_cyan")
+        if len(self.stats) > 1:
+            cprint(BatchStats.merged(list(self.stats.values())).summary(), "light_cyan")
+        cprint(odos_scheduler.stats(), "light_cyan")
+        cprint(self.proxy_pool.stats(), "light_cyan")
+
+    # Одна строка сводки: скорость, в работе, доля успешных и газ по сетям
+    def dashboard_line(self) -> str:
+        stats = BatchStats.merged(list(self.stats.values()))
+        gas = ", ".join(f"{network} {part.gas_spent / 10 ** 18:.6f}" for network, part in self.stats.items())
+        return (f"📊 {stats.done}/{stats.total} | {stats.rate():.2f} кош/с | в работе {stats.in_flight} | "
+                f"✅ {stats.success_rate():.0%} ({stats.success}) ❌ {stats.failed} ⛔ {stats.skipped} | ⛽ {gas}")
+
+    # Периодический вывод прогресса; в тихом режиме строка сводки перерисовывается на месте
+    async def report_progress(self, console: Any = None) -> None:
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            if console is None:
+                self.print_stats()
+            elif console.isatty():
+                console.write(f"\r\033[K{self.dashboard_line()}")
+                console.flush()
+            else:
+                console.write(f"{self.dashboard_line()}\n")
+                console.flush()
+
+    # Все кошельки в одной сети: столько воркеров, сколько позволяет лимит сети, берут кошельки по очереди,
+    # так что Client и корутина существуют только у кошельков в работе
+    async def run_network(self, network: str, network_data: Dict[str, Any], store: WalletStore) -> None:
+        states, _ = await asyncio.gather(
+            self.read_states(network, network_data, store.addresses),
+            self.report_quote(network, network_data, store.private_keys[0], store.addresses[0]),
+        )
+        queue = iter(range(len(store)))
+
+        async def worker() -> None:
+            for index in queue:
+                address = store.addresses[index]
+                await self.run_wallet(network, network_data, store.private_keys[index], address, states.get(address))
+
+        limit = self.network_limits.get(network, self.max_concurrent_per_network)
+        await asyncio.gather(*(worker() for _ in range(min(limit, len(store)))))
+
+    # Запуск всех кошельков во всех сетях параллельно
+    async def run(self, networks: Dict[str, Dict[str, Any]], store: WalletStore) -> BatchStats:
+        self.stats = {network: BatchStats(len(store), network) for network in networks}
+
+        # В тихом режиме вывод кошельков отбрасывается: подробности каждого есть в файле результатов
+        console = sys.stdout if self.quiet else None
+        with contextlib.ExitStack() as stack:
+            if self.quiet:
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+            reporter = asyncio.create_task(self.report_progress(console))
+            try:
+                await asyncio.gather(
+                    *(self.run_network(network, network_data, store) for network, network_data in networks.items())
+                )
+            finally:
+                reporter.cancel()
+        if console is not None and console.isatty():
+            print(f"\r\033[K{self.dashboard_line()}")
+        self.print_stats()
+        cprint(quote_cache.stats(), "light_cyan")
+        return BatchStats.merged(list(self.stats.values()))
@@ -0,0 +1,86 @@
+from benchmarks.fake_rpc import CHAIN_ID, GAS_PRICE, SWAP
+from typing import Any, Dict, Tuple
+from benchmarks.server import Faults
+from collections import Counter
+from eth_abi import encode
+from eth_utils import keccak
+from aiohttp import web
+import itertools
+
+# Условный курс входного токена к выходному и цены в USD
+RATE = 2000
+IN_TOKEN_USD = 2000
+OUT_TOKEN_USD = 1
+# Влияние на цену в % растёт с размером сделки: столько % на один входной токен
+PRICE_IMPACT_PER_TOKEN = 2.0
+GAS_ESTIMATE = 150000
+
+
+class FakeOdos:
+    """Заглушка Odos API: /sor/quote/v2 и /sor/assemble с задержкой и ответами 429"""
+
+    def __init__(self, router: str, faults: Faults, retry_after: float = 0.1) -> None:
+        self.router = router
+        self.faults = faults
+        self.retry_after = retry_after
+        self.paths: Dict[str, Tuple[str, int]] = {}
+        self.requests: Counter = Counter()
+        self._ids = itertools.count()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/sor/quote/v2", self.quote)
+        app.router.add_post("/sor/assemble", self.assemble)
+        return app
+
+    async def _fail(self, name: str) -> bool:
+        self.requests[name] += 1
+        if await self.faults.apply():
+            self.requests[f"{name}_429"] += 1
+            return True
+        return False
+
+    def _too_many_requests(self) -> web.Response:
+        return web.Response(status=429, text="rate limited", headers={"Retry-After": str(self.retry_after)})
+
+    async def quote(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if await self._fail("quote"):
+            return self._too_many_requests()
+        amount = int(body["inputTokens"][0]["amount"])
+        to_address = body["outputTokens"][0]["tokenAddress"]
+        path_id = f"{next(self._ids):032x}"
+        self.paths[path_id] = (body["userAddr"], amount)
+        # У каждого выходного токена своя глубина ликвидности, до ±20% от базовой
+        depth = 1 + (int(keccak(text=to_address.lower())[0]) - 128) / 640
+        price_impact = PRICE_IMPACT_PER_TOKEN * amount / 10 ** 18 / depth
+        out_amount = int(amount * RATE * (1 - price_impact / 100))
+        return web.json_response({
+            "pathId": path_id,
+            "inAmounts": [str(amount)],
+            "outAmounts": [str(out_amount)],
+            "outValues": [out_amount / 10 ** 18 * OUT_TOKEN_USD],
+            "priceImpact": price_impact,
+            "gasEstimate": GAS_ESTIMATE,
+            "gasEstimateValue": GAS_ESTIMATE * GAS_PRICE / 10 ** 18 * IN_TOKEN_USD,
+        })
+
+    async def assemble(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if await self._fail("assemble"):
+            return self._too_many_requests()
+        path = self.paths.pop(body.get("pathId"), None)
+        if path is None:
+            return web.json_response({"detail": "Path not found"}, status=400)
+        user, amount = path
+        transaction: Dict[str, Any] = {
+            "to": self.router,
+            "from": user,
+            "data": "0x" + (SWAP + encode(["uint256"], [amount])).hex(),
+            "value": "0",
+            "chainId": CHAIN_ID,
+            "gas": 300000,
+            "gasPrice": GAS_PRICE,
+            "nonce": 0,
+        }
+        return web.json_response({"transaction": transaction})
@@ -0,0 +1,314 @@
+from multicall import ALLOWANCE, BALANCE_OF, DECIMALS, GET_ETH_BALANCE, MULTICALL3_ADDRESS
+from eth_account._utils.legacy_transactions import Transaction
+from eth_account._utils.typed_transactions import TypedTransaction
+from eth_utils import function_signature_to_4byte_selector, keccak, to_checksum_address
+from typing import Any, Callable, Dict, List, Optional
+from benchmarks.server import Faults
+from collections import Counter
+from eth_account import Account
+from eth_abi import decode, encode
+from aiohttp import web
+import time
+import rlp
+
+CHAIN_ID = 31337
+GAS_PRICE = 10 ** 9
+PRIORITY_FEE = 10 ** 8
+GAS_USED = 21000
+GAS_ESTIMATE = 50000
+
+AGGREGATE3 = function_signature_to_4byte_selector("aggregate3((address,bool,bytes)[])")
+APPROVE = function_signature_to_4byte_selector("approve(address,uint256)")
+DEPOSIT = function_signature_to_4byte_selector("deposit()")
+# Селектор свапа в calldata от заглушки Odos: за ним сумма входного токена
+SWAP = function_signature_to_4byte_selector("swapCompact()")
+
+ZERO_HASH = "0x" + "00" * 32
+ZERO_BLOOM = "0x" + "00" * 256
+
+
+class RpcError(Exception):
+    def __init__(self, message: str, code: int = -32000) -> None:
+        super().__init__(message)
+        self.code = code
+
+
+class WalletAccount:
+    def __init__(self, balance: int, token_balance: int) -> None:
+        self.balance = balance
+        self.nonce = 0
+        self.token_balance = token_balance
+        self.allowance = 0
+
+
+class PendingTx:
+    def __init__(self, tx_hash: str, sender: str, nonce: int, to: Optional[str], value: int,
+                 data: bytes, gas_price: int) -> None:
+        self.tx_hash = tx_hash
+        self.sender = sender
+        self.nonce = nonce
+        self.to = to
+        self.value = value
+        self.data = data
+        self.gas_price = gas_price
+
+
+class FakeChain:
+    """Модель сети для бенчмарка: балансы, WETH, allowance, мемпул и блоки по таймеру"""
+
+    def __init__(self, token: str, router: str, block_time: float = 1.0,
+                 initial_balance: int = 10 ** 18, initial_token_balance: int = 0,
+                 unfunded_rate: float = 0.0, multicall: str = MULTICALL3_ADDRESS) -> None:
+        self.token = token.lower()
+        self.router = router.lower()
+        self.multicall = multicall.lower()
+        self.block_time = block_time
+        self.initial_balance = initial_balance
+        self.initial_token_balance = initial_token_balance
+        self.unfunded_rate = unfunded_rate
+        self.started_at = time.monotonic()
+        self.block_number = 0
+        self.blocks: Dict[int, List[str]] = {0: []}
+        self.accounts: Dict[str, WalletAccount] = {}
+        self.mempool: Dict[str, Dict[int, PendingTx]] = {}
+        self.receipts: Dict[str, Dict[str, Any]] = {}
+        # Одна транзакция приходит на несколько узлов сразу — отправитель восстанавливается один раз
+        self.senders: Dict[bytes, str] = {}
+        self.handlers: Dict[str, Callable[[list], Any]] = {
+            "eth_chainId": lambda params: hex(CHAIN_ID),
+            "eth_blockNumber": lambda params: hex(self.block_number),
+            "eth_gasPrice": lambda params: hex(GAS_PRICE),
+            "eth_maxPriorityFeePerGas": lambda params: hex(PRIORITY_FEE),
+            "eth_feeHistory": self.fee_history,
+            "eth_getBalance": lambda params: hex(self.account(params[0]).balance),
+            "eth_getTransactionCount": self.transaction_count,
+            "eth_estimateGas": self.estimate_gas,
+            "eth_call": self.eth_call,
+            "eth_sendRawTransaction": self.send_raw_transaction,
+            "eth_getTransactionReceipt": lambda params: self.receipts.get(params[0].lower()),
+            "eth_getBlockByNumber": self.get_block,
+        }
+
+    def account(self, address: str) -> WalletAccount:
+        address = address.lower()
+        if address not in self.accounts:
+            # Доля кошельков без баланса выбирается по адресу, одинаково от прогона к прогону
+            unfunded = keccak(text=address)[0] < 256 * self.unfunded_rate
+            balance = 0 if unfunded else self.initial_balance
+            self.accounts[address] = WalletAccount(balance, self.initial_token_balance)
+        return self.accounts[address]
+
+    # Новые блоки по таймеру; в блок попадают транзакции с подходящим nonce
+    def mine(self) -> None:
+        target = int((time.monotonic() - self.started_at) / self.block_time)
+        while self.block_number < target:
+            self.block_number += 1
+            included = []
+            for sender, pending in self.mempool.items():
+                account = self.account(sender)
+                while account.nonce in pending:
+                    tx = pending.pop(account.nonce)
+                    self.execute(tx, account)
+                    included.append(tx.tx_hash)
+            self.blocks[self.block_number] = included
+
+    def execute(self, tx: PendingTx, account: WalletAccount) -> None:
+        account.nonce += 1
+        account.balance -= tx.gas_price * GAS_USED
+        success = account.balance >= tx.value
+        if success and tx.to == self.token and tx.data[:4] == APPROVE:
+            account.allowance = decode(["address", "uint256"], tx.data[4:])[1]
+        elif success and tx.to == self.token and tx.data[:4] == DEPOSIT:
+            account.balance -= tx.value
+            account.token_balance += tx.value
+        elif success and tx.to == self.router and tx.data[:4] == SWAP:
+            amount = decode(["uint256"], tx.data[4:])[0]
+            success = account.allowance >= amount and account.token_balance >= amount
+            if success:
+                account.token_balance -= amount
+
+        self.receipts[tx.tx_hash] = {
+            "transactionHash": tx.tx_hash,
+            "status": "0x1" if success else "0x0",
+            "blockNumber": hex(self.block_number),
+            "blockHash": ZERO_HASH,
+            "transactionIndex": "0x0",
+            "from": tx.sender,
+            "to": tx.to,
+            "cumulativeGasUsed": hex(GAS_USED),
+            "gasUsed": hex(GAS_USED),
+            "contractAddress": None,
+            "logs": [],
+            "logsBloom": ZERO_BLOOM,
+            "effectiveGasPrice": hex(tx.gas_price),
+            "type": "0x0",
+        }
+
+    def fee_history(self, params: list) -> Dict[str, Any]:
+        count = int(params[0], 16) if isinstance(params[0], str) else params[0]
+        percentiles = params[2] if len(params) > 2 else []
+        return {
+            "oldestBlock": hex(max(self.block_number - count + 1, 0)),
+            "baseFeePerGas": [hex(GAS_PRICE - PRIORITY_FEE)] * (count + 1),
+            "gasUsedRatio": [0.5] * count,
+            "reward": [[hex(PRIORITY_FEE)] * len(percentiles) for _ in range(count)],
+        }
+
+    def transaction_count(self, params: list) -> str:
+        account = self.account(params[0])
+        nonce = account.nonce
+        if len(params) > 1 and params[1] == "pending":
+            pending = self.mempool.get(params[0].lower(), {})
+            while nonce in pending:
+                nonce += 1
+        return hex(nonce)
+
+    def get_block(self, params: list) -> Dict[str, Any]:
+        number = self.block_number if params[0] in ("latest", "pending") else int(params[0], 16)
+        return {
+            "number": hex(number),
+            "hash": "0x" + keccak(number.to_bytes(32, "big")).hex(),
+            "parentHash": ZERO_HASH,
+            "transactions": self.blocks.get(number, []),
+            "timestamp": hex(int(self.started_at + number * self.block_time)),
+            "miner": "0x" + "00" * 20,
+            "gasLimit": hex(30_000_000),
+            "gasUsed": hex(GAS_USED * len(self.blocks.get(number, []))),
+            "baseFeePerGas": hex(GAS_PRICE - PRIORITY_FEE),
+            "difficulty": "0x0",
+            "extraData": "0x",
+            "logsBloom": ZERO_BLOOM,
+            "nonce": "0x0000000000000000",
+            "receiptsRoot": ZERO_HASH,
+            "sha3Uncles": ZERO_HASH,
+            "size": "0x1",
+            "stateRoot": ZERO_HASH,
+            "totalDifficulty": "0x0",
+            "transactionsRoot": ZERO_HASH,
+            "uncles": [],
+        }
+
+    # Вызов view-функции токена или Multicall3
+    def call(self, to: str, data: bytes) -> bytes:
+        selector, args = data[:4], data[4:]
+        if to == self.multicall and selector == AGGREGATE3:
+            results = []
+            for target, _, call_data in decode(["(address,bool,bytes)[]"], args)[0]:
+                try:
+                    results.append((True, self.call(target.lower(), call_data)))
+                except RpcError:
+                    results.append((False, b""))
+            return encode(["(bool,bytes)[]"], [results])
+        if to == self.multicall and selector == GET_ETH_BALANCE:
+            return encode(["uint256"], [self.account(decode(["address"], args)[0]).balance])
+        if to == self.token and selector == DECIMALS:
+            return encode(["uint256"], [18])
+        if to == self.token and selector == BALANCE_OF:
+            return encode(["uint256"], [self.account(decode(["address"], args)[0]).token_balance])
+        if to == self.token and selector == ALLOWANCE:
+            return encode(["uint256"], [self.account(decode(["address", "address"], args)[0]).allowance])
+        raise RpcError("execution reverted", 3)
+
+    # Вызов с отправителем: view-функции и симуляция approve, deposit и свапа
+    def eth_call(self, params: list) -> str:
+        tx = params[0]
+        to = tx["to"].lower()
+        data = bytes.fromhex((tx.get("data") or tx.get("input") or "0x")[2:])
+        selector = data[:4]
+        if tx.get("from") and selector in (APPROVE, DEPOSIT, SWAP):
+            account = self.account(tx["from"])
+            value = int(tx.get("value") or "0x0", 16)
+            if to == self.token and selector == APPROVE:
+                return "0x" + encode(["bool"], [True]).hex()
+            if to == self.token and selector == DEPOSIT:
+                if account.balance < value:
+                    raise RpcError("insufficient funds for transfer")
+                return "0x"
+            if to == self.router and selector == SWAP:
+                amount = decode(["uint256"], data[4:])[0]
+                if account.allowance < amount:
+                    raise RpcError("execution reverted: TRANSFER_FROM_FAILED", 3)
+                if account.token_balance < amount:
+                    raise RpcError("execution reverted: insufficient balance", 3)
+                return "0x"
+        return "0x" + self.call(to, data).hex()
+
+    def estimate_gas(self, params: list) -> str:
+        self.eth_call(params)
+        return hex(GAS_ESTIMATE)
+
+    def send_raw_transaction(self, params: list) -> str:
+        raw = bytes.fromhex(params[0][2:])
+        if raw[0] < 0x7f:
+            fields = TypedTransaction.from_bytes(raw).as_dict()
+            gas_price = fields["maxFeePerGas"]
+        else:
+            legacy = rlp.decode(raw, Transaction)
+            fields = {"nonce": legacy.nonce, "to": legacy.to, "value": legacy.value, "data": legacy.data}
+            gas_price = legacy.gasPrice
+
+        tx_hash = keccak(raw)
+        sender = self.senders.get(tx_hash)
+        if sender is None:
+            sender = self.senders[tx_hash] = Account.recover_transaction(raw).lower()
+        to = to_checksum_address(fields["to"]).lower() if fields["to"] else None
+        tx = PendingTx("0x" + tx_hash.hex(), sender, fields["nonce"], to, fields["value"],
+                       bytes(fields["data"]), gas_price)
+
+        account = self.account(sender)
+        if tx.nonce < account.nonce:
+            raise RpcError("nonce too low")
+        pending = self.mempool.setdefault(sender, {})
+        replaced = pending.get(tx.nonce)
+        if replaced is not None and tx.gas_price < replaced.gas_price * 1.1:
+            raise RpcError("replacement transaction underpriced")
+        pending[tx.nonce] = tx
+        return tx.tx_hash
+
+
+class FakeRpc:
+    """JSON-RPC заглушка с batch-запросами, задержкой, ошибками и подсчётом вызовов"""
+
+    def __init__(self, chain: FakeChain, faults: Faults, endpoints: int = 1) -> None:
+        self.chain = chain
+        self.faults = faults
+        self.endpoints = endpoints
+        self.http_requests = 0
+        self.calls: Counter = Counter()
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        for index in range(self.endpoints):
+            app.router.add_post(f"/rpc/{index}", self.handle)
+        return app
+
+    def urls(self, base_url: str) -> List[str]:
+        return [f"{base_url}/rpc/{index}" for index in range(self.endpoints)]
+
+    def dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method = request.get("method")
+        self.calls[method] += 1
+        response: Dict[str, Any] = {"jsonrpc": "2.0", "id": request.get("id")}
+        handler = self.chain.handlers.get(method)
+        if handler is None:
+            response["error"] = {"code": -32601, "message": f"method {method} not supported"}
+            return response
+        try:
+            response["result"] = handler(request.get("params") or [])
+        except RpcError as e:
+            response["error"] = {"code": e.code, "message": str(e)}
+        return response
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.http_requests += 1
+        body = await request.json()
+        if await self.faults.apply():
+            return web.Response(status=503, text="injected failure")
+        self.chain.mine()
+        if isinstance(body, list):
+            return web.json_response([self.dispatch(item) for item in body])
+        return web.json_response(self.dispatch(body))
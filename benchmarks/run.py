@@ -0,0 +1,237 @@
+"""Офлайн бенчмарк полного цикла свапа на локальных заглушках Odos API и RPC (в отдельном процессе).
+
+Запуск из корня проекта:
+    python -m benchmarks.run --wallets 200 --rpc-latency 0.02 --odos-latency 0.05
+Результаты дописываются в benchmarks/results.jsonl и сравниваются с прошлым прогоном с теми же параметрами.
+"""
+from benchmarks.stubs import StubProcess
+from benchmarks.fake_rpc import CHAIN_ID
+from typing import Any, Dict, List, Optional
+from odos_scheduler import odos_scheduler
+from metrics import metrics
+from http_session import close_sessions
+from eth_utils import keccak
+from wallet_store import WalletStore
+from signer import ProcessSigner
+from proxy_pool import ProxyPool
+from results import ResultsWriter
+from batch import BatchRunner
+import contextlib
+import subprocess
+import argparse
+import sys
+import resource
+import tempfile
+import asyncio
+import json
+import time
+import os
+import io
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDRESS_CACHE = os.path.join(tempfile.gettempdir(), "odos-benchmark-addresses.cache")
+WALLET_RESULTS = os.path.join(tempfile.gettempdir(), "odos-benchmark-wallets.jsonl")
+
+TOKEN_IN = "0x4200000000000000000000000000000000000006"
+TOKEN_OUT = "0x833589fCD6eDb6E08f4c7C32D4f71b54bdA02913"
+ALTERNATE_TOKENS_OUT = ["0x50c5725949A6F0c72E6C4a641F24049A917DB0Cb", "0xfde4C96c8593536E31F229EA8f37b2ADa2699bb2"]
+ROUTER = "0x19cEeAd7105607Cd444F5ad10dd51356436095a1"
+
+# Бюджет холодного импорта main.py, то есть времени до первого вывода скрипта, секунды
+STARTUP_BUDGET = 0.6
+STARTUP_RUNS = 3
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(RESULTS_FILE), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+# Холодный импорт в новом интерпретаторе; лучший из нескольких запусков, чтобы не мерить шум диска
+def measure_import(modules: str, runs: int = STARTUP_RUNS) -> float:
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {modules}"], cwd=ROOT_DIR, check=True)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def wallet_keys(count: int) -> List[str]:
+    return ["0x" + keccak(f"benchmark-wallet-{index}".encode()).hex() for index in range(count)]
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    stubs = StubProcess({
+        "token": TOKEN_IN, "router": ROUTER, "block_time": args.block_time, "seed": args.seed,
+        "rpc_endpoints": args.rpc_endpoints, "rpc_latency": args.rpc_latency, "rpc_jitter": args.rpc_jitter,
+        "rpc_error_rate": args.rpc_error_rate, "odos_latency": args.odos_latency,
+        "odos_jitter": args.odos_jitter, "odos_error_rate": args.odos_error_rate,
+        "unfunded_rate": args.unfunded_rate,
+    })
+    rpc_urls, odos_url = stubs.start()
+
+    network = {
+        "chain_id": CHAIN_ID,
+        "rpc_urls": rpc_urls,
+        "explorer_url": "http://explorer.local/",
+        "to_address": TOKEN_OUT,
+        "from_address": TOKEN_IN,
+        "router_address": ROUTER,
+        "alternate_to_addresses": ALTERNATE_TOKENS_OUT,
+    }
+    odos_scheduler.configure(global_rps=args.odos_rps, proxy_rps=args.odos_rps)
+    load_started = time.perf_counter()
+    store = WalletStore.load(wallet_keys(args.wallets), ADDRESS_CACHE)
+    store_load = time.perf_counter() - load_started
+    signer = None
+    if args.signer_processes:
+        signer = ProcessSigner(store, args.signer_processes)
+        await signer.warm_up()
+    # Итоги кошельков пишутся как в обычном запуске, файл перезаписывается каждым прогоном
+    if os.path.exists(WALLET_RESULTS):
+        os.remove(WALLET_RESULTS)
+    results = ResultsWriter(WALLET_RESULTS)
+    await results.start()
+    runner = BatchRunner(args.amount, ProxyPool([]), args.concurrency, args.concurrency, args.pipeline,
+                         api_url=odos_url, signer=signer, preflight=args.preflight, route_splits=args.route_splits,
+                         route_alternates=args.route_alternates, results=results, progress_interval=3600)
+
+    metrics.reset()
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    started = time.perf_counter()
+    try:
+        with output:
+            stats = await runner.run({"Benchmark": network}, store)
+    finally:
+        elapsed = time.perf_counter() - started
+        await results.close()
+        if signer is not None:
+            signer.close()
+        try:
+            stub_stats = await stubs.stats()
+        finally:
+            await close_sessions()
+            stubs.stop()
+    rpc_calls = stub_stats["calls"]
+
+    return {
+        "wallets": args.wallets,
+        "success": stats.success,
+        "failed": stats.failed,
+        "skipped": stats.skipped,
+        "elapsed": round(elapsed, 3),
+        "store_load_seconds": round(store_load, 4),
+        "wallets_per_sec": round(args.wallets / elapsed, 3),
+        "rpc_calls_per_wallet": round(sum(rpc_calls.values()) / args.wallets, 2),
+        "rpc_http_per_wallet": round(stub_stats["http_requests"] / args.wallets, 2),
+        "rpc_calls_by_method": rpc_calls,
+        "odos_requests": stub_stats["odos_requests"],
+        "odos_retries": odos_scheduler.retries,
+        "results_written": results.written,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        **metrics.snapshot(),
+    }
+
+
+# Параметры, от которых зависит сравнимость прогонов
+def comparable_params(args: argparse.Namespace) -> Dict[str, Any]:
+    return {key: value for key, value in vars(args).items()
+            if key not in ("verbose", "no_save", "seed", "startup_budget")}
+
+
+def previous_result(params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(RESULTS_FILE):
+        return None
+    previous = None
+    with open(RESULTS_FILE, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get("params") == params:
+                previous = entry
+    return previous
+
+
+def print_report(metrics: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> None:
+    print(f"Кошельков: {metrics['wallets']} (✅ {metrics['success']} ❌ {metrics['failed']} "
+          f"⛔ {metrics['skipped']}) "
+          f"за {metrics['elapsed']}с — {metrics['wallets_per_sec']} кошельков/сек")
+    print(f"RPC на кошелёк: {metrics['rpc_calls_per_wallet']} вызовов, {metrics['rpc_http_per_wallet']} HTTP")
+    print(f"Odos: {metrics['odos_requests']}, повторов {metrics['odos_retries']}")
+    print(f"Пиковая память: {metrics['peak_rss_mb']} МБ, загрузка кошельков {metrics['store_load_seconds']}с")
+    print(f"Запуск: импорт main {metrics['startup_seconds']}с, вместе со стеком web3 "
+          f"{metrics['startup_full_seconds']}с")
+    print(f"{'этап':<26}{'кол-во':>8}{'p50':>10}{'p95':>10}{'p99':>10}")
+    for stage, row in metrics["stages"].items():
+        print(f"{stage:<26}{row['count']:>8}{row['p50']:>10.4f}{row['p95']:>10.4f}{row['p99']:>10.4f}")
+
+    if previous is not None:
+        before = previous["metrics"]
+        print(f"\nСравнение с прогоном {previous.get('commit') or '?'} от "
+              f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(previous['ts']))}:")
+        for key in ("wallets_per_sec", "rpc_calls_per_wallet", "rpc_http_per_wallet", "peak_rss_mb",
+                    "startup_seconds"):
+            if before.get(key):
+                change = (metrics[key] - before[key]) / before[key] * 100
+                print(f"  {key}: {before[key]} → {metrics[key]} ({change:+.1f}%)")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Офлайн бенчмарк свапов на локальных заглушках")
+    parser.add_argument("--wallets", type=int, default=100)
+    parser.add_argument("--amount", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, default=50, help="параллельных кошельков")
+    parser.add_argument("--pipeline", action="store_true", help="конвейерный режим отправки")
+    parser.add_argument("--preflight", action="store_true", help="симуляция транзакций перед подписью")
+    parser.add_argument("--route-splits", type=int, nargs="+", default=None,
+                        help="варианты деления суммы для поиска маршрута, например 1 2 4")
+    parser.add_argument("--route-alternates", action="store_true", help="сравнивать альтернативные выходные токены")
+    parser.add_argument("--signer-processes", type=int, default=0, help="процессов для подписи")
+    parser.add_argument("--unfunded-rate", type=float, default=0.0, help="доля кошельков без нативного баланса")
+    parser.add_argument("--block-time", type=float, default=0.5)
+    parser.add_argument("--rpc-endpoints", type=int, default=2)
+    parser.add_argument("--rpc-latency", type=float, default=0.02, help="задержка RPC, секунд")
+    parser.add_argument("--rpc-jitter", type=float, default=0.01)
+    parser.add_argument("--rpc-error-rate", type=float, default=0.0, help="доля ответов 503")
+    parser.add_argument("--odos-latency", type=float, default=0.05, help="задержка Odos API, секунд")
+    parser.add_argument("--odos-jitter", type=float, default=0.02)
+    parser.add_argument("--odos-error-rate", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--odos-rps", type=float, default=1000, help="лимит очереди Odos API")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET,
+                        help="допустимое время импорта main.py, секунд")
+    parser.add_argument("--verbose", action="store_true", help="не скрывать вывод кошельков")
+    parser.add_argument("--no-save", action="store_true", help="не записывать результат")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    startup = {"startup_seconds": round(measure_import("main"), 3),
+               "startup_full_seconds": round(measure_import("main, batch"), 3)}
+    metrics = {**asyncio.run(run_benchmark(args)), **startup}
+    params = comparable_params(args)
+    print_report(metrics, previous_result(params))
+
+    if not args.no_save:
+        entry = {"ts": time.time(), "commit": git_commit(), "params": params, "metrics": metrics}
+        with open(RESULTS_FILE, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    if metrics["startup_seconds"] > args.startup_budget:
+        print(f"\n❌ Импорт main.py занял {metrics['startup_seconds']}с при бюджете {args.startup_budget}с")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
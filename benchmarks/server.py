@@ -0,0 +1,32 @@
+from typing import Optional, Tuple
+from aiohttp import web
+import asyncio
+import random
+
+
+class Faults:
+    """Искусственная задержка и доля ошибок для локальных заглушек"""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 seed: Optional[int] = None) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+
+    # Задержка ответа; True — этот запрос должен завершиться ошибкой
+    async def apply(self) -> bool:
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.random.random() < self.error_rate
+
+
+# Запуск aiohttp приложения на свободном локальном порту
+async def start_app(app: web.Application) -> Tuple[web.AppRunner, str]:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
@@ -0,0 +1,68 @@
+from benchmarks.server import Faults, start_app
+from benchmarks.fake_rpc import FakeChain, FakeRpc
+from multiprocessing.connection import Connection
+from benchmarks.fake_odos import FakeOdos
+from typing import Any, Dict, List, Tuple
+from http_session import get_session
+from aiohttp import web
+import multiprocessing
+import asyncio
+
+
+# Точка входа дочернего процесса: заглушки работают в своём цикле событий и не отнимают CPU у клиента
+def serve(conn: Connection, options: Dict[str, Any]) -> None:
+    asyncio.run(_serve(conn, options))
+
+
+async def _serve(conn: Connection, options: Dict[str, Any]) -> None:
+    chain = FakeChain(options["token"], options["router"], block_time=options["block_time"],
+                      unfunded_rate=options["unfunded_rate"])
+    rpc = FakeRpc(chain, Faults(options["rpc_latency"], options["rpc_jitter"], options["rpc_error_rate"],
+                                options["seed"]), endpoints=options["rpc_endpoints"])
+    fake_odos = FakeOdos(options["router"], Faults(options["odos_latency"], options["odos_jitter"],
+                                                   options["odos_error_rate"], options["seed"]))
+
+    async def stats(_: web.Request) -> web.Response:
+        return web.json_response({
+            "http_requests": rpc.http_requests,
+            "calls": dict(rpc.calls.most_common()),
+            "odos_requests": dict(fake_odos.requests),
+        })
+
+    rpc_app = rpc.app()
+    rpc_app.router.add_get("/stats", stats)
+    _, rpc_url = await start_app(rpc_app)
+    _, odos_url = await start_app(fake_odos.app())
+    conn.send((rpc_url, rpc.urls(rpc_url), odos_url))
+    await asyncio.Event().wait()
+
+
+class StubProcess:
+    """Заглушки Odos API и RPC в отдельном процессе"""
+
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.options = options
+        self.process = None
+        self.stats_url = ""
+
+    def start(self) -> Tuple[List[str], str]:
+        context = multiprocessing.get_context("spawn")
+        parent, child = context.Pipe()
+        self.process = context.Process(target=serve, args=(child, self.options), daemon=True)
+        self.process.start()
+        if not parent.poll(30):
+            self.stop()
+            raise RuntimeError("Заглушки не запустились за 30 секунд")
+        rpc_url, rpc_urls, odos_url = parent.recv()
+        self.stats_url = f"{rpc_url}/stats"
+        return rpc_urls, odos_url
+
+    async def stats(self) -> Dict[str, Any]:
+        async with get_session().get(self.stats_url) as response:
+            return await response.json()
+
+    def stop(self) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(5)
+            self.process = None
@@ -1,17 +1,81 @@
-from web3.exceptions import TransactionNotFound
-from web3 import AsyncWeb3, AsyncHTTPProvider
-from typing import Optional, Union
+from multicall import MULTICALL3_ADDRESS, Multicall, WalletState
+from receipt_tracker import get_receipt_tracker
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from fee_oracle import FeeSnapshot, get_fee_oracle
+from rpc_batch import BatchingHTTPProvider
+from proxy_pool import ProxyPool
+from nonce_manager import nonce_manager
+from metrics import metrics, timed
+from signer import ProcessSigner
+from contracts import get_contract
+from web3 import AsyncWeb3
 from web3.contract import AsyncContract
-from web3.types import TxParams
+from web3.types import TxParams, TxReceipt
 from hexbytes import HexBytes
 from termcolor import cprint
 import asyncio
 
+# ABI для balanceOf
+ERC20_BALANCE_ABI = [
+    {
+        "inputs": [{"name": "_owner", "type": "address"}],
+        "name": "balanceOf",
+        "outputs": [{"name": "balance", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "decimals",
+        "outputs": [{"name": "", "type": "uint8"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "symbol",
+        "outputs": [{"name": "", "type": "string"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+
+ERC20_ALLOWANCE_ABI = {
+    "inputs": [{"name": "_owner", "type": "address"}, {"name": "_spender", "type": "address"}],
+    "name": "allowance",
+    "outputs": [{"name": "", "type": "uint256"}],
+    "stateMutability": "view",
+    "type": "function"
+}
+
+ERC20_STATE_ABI = ERC20_BALANCE_ABI + [ERC20_ALLOWANCE_ABI]
+
+# Ключ закрепления прокси за общими для сети оракулом газа и трекером квитанций
+SHARED_PROXY_KEY = "shared"
+
+
+# Общие AsyncWeb3 с batch-провайдером по (rpc_urls, proxy): вызовы разных кошельков попадают в одну пачку,
+# а кошелёк не держит собственный экземпляр
+_web3s: Dict[Tuple[Tuple[str, ...], Optional[str]], AsyncWeb3] = {}
+
+
+# AsyncWeb3 поверх пула RPC узлов сети; ошибки соединения через прокси учитываются в пуле прокси
+def make_w3(rpc_urls: List[str], proxy: Optional[str] = None, proxy_pool: Optional[ProxyPool] = None) -> AsyncWeb3:
+    key = (tuple(rpc_urls), proxy)
+    if key not in _web3s:
+        _web3s[key] = AsyncWeb3(BatchingHTTPProvider(list(rpc_urls), proxy=proxy, proxy_pool=proxy_pool))
+    return _web3s[key]
+
 
 class Client:
-    def __init__(self, from_address: str, to_address: str, chain_id: int, rpc_url: str, private_key: str,
-                 amount: float, router_address: str, explorer_url: str, proxy: Optional[str] = None):
-        request_kwargs = {"proxy": f"http://{proxy}"} if proxy else {}
+    # chain id по набору RPC узлов, запрашивается один раз за процесс
+    _chain_ids: Dict[Tuple[str, ...], int] = {}
+
+    def __init__(self, from_address: str, to_address: str, chain_id: int, rpc_urls: List[str], private_key: str,
+                 amount: float, router_address: str, explorer_url: str, proxy: Optional[str] = None,
+                 multicall_address: str = MULTICALL3_ADDRESS, signer: Optional[ProcessSigner] = None,
+                 address: Optional[str] = None, proxy_pool: Optional[ProxyPool] = None):
         self.router_address = router_address
         self.from_address = from_address
         self.explorer_url = explorer_url
@@ -20,12 +84,20 @@ class Client:
         self.chain_id = chain_id
         self.amount = amount
         self.proxy = proxy
-        self.w3 = AsyncWeb3(AsyncHTTPProvider(rpc_url, request_kwargs=request_kwargs))
+        self.proxy_pool = proxy_pool
+        self.rpc_urls = tuple(rpc_urls)
+        self.w3 = make_w3(rpc_urls, proxy, proxy_pool)
+        self.multicall_address = multicall_address
+        self.signer = signer
         self.eip_1559 = True
-        self.address = self.w3.to_checksum_address(
+        # Газ подтверждённых транзакций кошелька по хэшу: (gasUsed, потрачено wei)
+        self.gas: Dict[str, Tuple[int, int]] = {}
+        # Адрес из WalletStore избавляет от повторного вычисления публичного ключа
+        self.address = address or self.w3.to_checksum_address(
             self.w3.eth.account.from_key(self.private_key).address)
 
     # Получение баланса нативного токена
+    @timed("client.get_native_balance")
     async def get_native_balance(self) -> float:
         """Получает баланс нативного токена в ETH/BNB/MATIC и т.д."""
         balance_wei = await self.w3.eth.get_balance(self.address)
@@ -33,49 +105,104 @@ class Client:
         return balance_eth
 
     # Получение баланса ERC20
+    @timed("client.get_erc20_balance")
     async def get_erc20_balance(self) -> float | int:
-        # ABI для balanceOf
-        erc20_abi = [
-            {
-                "inputs": [{"name": "_owner", "type": "address"}],
-                "name": "balanceOf",
-                "outputs": [{"name": "balance", "type": "uint256"}],
-                "stateMutability": "view",
-                "type": "function"
-            },
-            {
-                "inputs": [],
-                "name": "decimals",
-                "outputs": [{"name": "", "type": "uint8"}],
-                "stateMutability": "view",
-                "type": "function"
-            },
-            {
-                "inputs": [],
-                "name": "symbol",
-                "outputs": [{"name": "", "type": "string"}],
-                "stateMutability": "view",
-                "type": "function"
-            }
-        ]
-        contract = self.w3.eth.contract(
-            address=self.w3.to_checksum_address(self.from_address), abi=erc20_abi)
+        contract = get_contract(self.w3, self.from_address, ERC20_BALANCE_ABI)
 
         balance = await contract.functions.balanceOf(self.address).call()
 
         return balance
 
+    # Allowance и балансы одним Multicall3 запросом
+    @timed("client.read_wallet_state")
+    async def read_wallet_state(self) -> WalletState:
+        try:
+            multicall = Multicall(self.w3, self.multicall_address)
+            states = await multicall.read_wallet_states(self.from_address, self.router_address, [self.address])
+            return states[self.address]
+        except Exception as e:
+            cprint(f"⚠️ Multicall недоступен ({e}), читаем состояние отдельными запросами", "light_yellow")
+
+        contract = get_contract(self.w3, self.from_address, ERC20_STATE_ABI)
+        allowance, token_balance, native_balance, decimals = await asyncio.gather(
+            contract.functions.allowance(self.address, self.w3.to_checksum_address(self.router_address)).call(),
+            contract.functions.balanceOf(self.address).call(),
+            self.w3.eth.get_balance(self.address),
+            contract.functions.decimals().call(),
+        )
+        return WalletState(allowance, token_balance, native_balance, decimals)
+
     # Создание объекта контракт для дальнейшего обращения к нему
     async def get_contract(self, contract_address: str, abi: list) -> AsyncContract:
-        return self.w3.eth.contract(
-            address=self.w3.to_checksum_address(contract_address), abi=abi
-        )
+        return get_contract(self.w3, contract_address, abi)
+
+    # Получение chain id с кэшированием
+    @timed("client.get_chain_id")
+    async def get_chain_id(self) -> int:
+        if self.rpc_urls not in Client._chain_ids:
+            Client._chain_ids[self.rpc_urls] = await self.w3.eth.chain_id
+        return Client._chain_ids[self.rpc_urls]
+
+    # Следующий локальный nonce
+    @timed("client.get_nonce")
+    async def get_nonce(self) -> int:
+        return await nonce_manager.next_nonce(self.w3, self.chain_id, self.address)
+
+    # Подпись транзакции в текущем потоке
+    def sign_tx(self, transaction: TxParams) -> HexBytes:
+        return self.w3.eth.account.sign_transaction(transaction, self.private_key).rawTransaction
+
+    # Подпись через пул процессов, если он задан, иначе в цикле событий
+    @timed("sign")
+    async def sign(self, transaction: TxParams) -> HexBytes:
+        if self.signer is not None and self.signer.can_sign(self.address):
+            return HexBytes(await self.signer.sign(self.address, transaction))
+        return self.sign_tx(transaction)
+
+    # Подпись и отправка без ожидания, с пересинхронизацией nonce при ошибке.
+    # on_signed получает хэш до отправки в сеть, чтобы его можно было сохранить заранее
+    @timed("client.send_tx")
+    async def send_tx(self, transaction: TxParams,
+                      on_signed: Optional[Callable[[HexBytes], Awaitable[None]]] = None) -> HexBytes:
+        try:
+            return await self._sign_and_broadcast(transaction, on_signed)
+        except Exception as e:
+            if not nonce_manager.is_nonce_error(e):
+                nonce_manager.invalidate(self.chain_id, self.address)
+                raise
+        cprint("⚠️ Nonce устарел, синхронизируемся с сетью...", "light_yellow")
+        metrics.count("nonce_resyncs")
+        await nonce_manager.resync(self.w3, self.chain_id, self.address)
+        transaction["nonce"] = await self.get_nonce()
+        return await self._sign_and_broadcast(transaction, on_signed)
+
+    async def _sign_and_broadcast(self, transaction: TxParams,
+                                  on_signed: Optional[Callable[[HexBytes], Awaitable[None]]]) -> HexBytes:
+        signed_raw_tx = await self.sign(transaction)
+        if on_signed is not None:
+            await on_signed(self.w3.keccak(signed_raw_tx))
+        with metrics.span("broadcast"):
+            return await self.w3.eth.send_raw_transaction(signed_raw_tx)
+
+    # AsyncWeb3 для общих сервисов сети: свой прокси из пула вместо прокси кошелька, создавшего сервис первым.
+    # Прокси меняется, только когда пул его отключил; пустой пул — прямое соединение
+    def shared_w3(self) -> AsyncWeb3:
+        proxy = self.proxy_pool.assign(SHARED_PROXY_KEY) if self.proxy_pool else self.proxy
+        return make_w3(self.rpc_urls, proxy, self.proxy_pool)
+
+    # Комиссии сети из общего оракула
+    @timed("client.get_fees")
+    async def get_fees(self) -> FeeSnapshot:
+        return await get_fee_oracle(self.chain_id, self.shared_w3()).get()
+
+    async def get_gas_price(self) -> int:
+        return (await self.get_fees()).gas_price
 
     # Получение суммы газа за транзакцию
     async def get_tx_fee(self) -> int:
-        fee_history = await self.w3.eth.fee_history(10, "latest", [50])
-        base_fee = fee_history['baseFeePerGas'][-1]
-        max_priority_fee = await self.w3.eth.max_priority_fee
+        fees = await self.get_fees()
+        base_fee = fees.base_fee
+        max_priority_fee = fees.max_priority_fee
         estimated_gas = 70_000
         max_fee_per_gas = (base_fee + max_priority_fee) * estimated_gas
 
@@ -108,15 +235,16 @@ class Client:
     # Подготовка транзакции
     async def prepare_tx(self, value: Union[int, float] = 0) -> TxParams:
         transaction: TxParams = {
-            "chainId": await self.w3.eth.chain_id,
-            "nonce": await self.w3.eth.get_transaction_count(self.address),
+            "chainId": await self.get_chain_id(),
+            "nonce": await self.get_nonce(),
             "from": self.address,
             "value": self.w3.to_wei(value, "ether"),
         }
 
         if self.eip_1559:
-            base_fee = await self.w3.eth.gas_price
-            max_priority_fee_per_gas = await self.w3.eth.max_priority_fee or base_fee
+            fees = await self.get_fees()
+            base_fee = fees.gas_price
+            max_priority_fee_per_gas = fees.max_priority_fee or base_fee
             max_fee_per_gas = int(base_fee * 1.25 + max_priority_fee_per_gas)
 
             transaction.update({
@@ -125,52 +253,50 @@ class Client:
                 "type": "0x2",
             })
         else:
-            transaction["gasPrice"] = int((await self.w3.eth.gas_price) * 1.25)
+            transaction["gasPrice"] = int((await self.get_gas_price()) * 1.25)
 
         return transaction
 
     # Подпись и отправка транзакции
+    @timed("client.sign_and_send_tx")
     async def sign_and_send_tx(self, transaction: TxParams, without_gas: bool = False):
         if not without_gas:
             transaction["gas"] = int((await self.w3.eth.estimate_gas(transaction)) * 1.5)
 
-        signed_raw_tx = self.w3.eth.account.sign_transaction(transaction, self.private_key).rawTransaction
-        cprint("✅ Транзакция успешно подписана!\n", "light_green")
-
-        tx_hash_bytes = await self.w3.eth.send_raw_transaction(signed_raw_tx)
+        tx_hash_bytes = await self.send_tx(transaction)
         tx_hash_hex = self.w3.to_hex(tx_hash_bytes)
         cprint("✅ Транзакция успешно отправлена!\n", "light_green")
 
         return await self.wait_tx(tx_hash_hex)
 
+    # Ожидание квитанции через общий трекер блоков сети
+    @timed("receipt")
+    async def wait_receipt(self, tx_hash: Union[str, HexBytes], timeout: float = 120) -> TxReceipt:
+        receipt = await get_receipt_tracker(self.chain_id, self.shared_w3()).wait(tx_hash, timeout)
+        gas_used = receipt.get("gasUsed") or 0
+        self.gas[HexBytes(tx_hash).hex()] = (gas_used, gas_used * (receipt.get("effectiveGasPrice") or 0))
+        return receipt
+
+    # Газ и его стоимость в wei по всем подтверждённым транзакциям кошелька
+    def gas_spent(self) -> Tuple[int, int]:
+        return sum(used for used, _ in self.gas.values()), sum(cost for _, cost in self.gas.values())
+
     # Ожидание результата транзакции
+    @timed("client.wait_tx")
     async def wait_tx(self, tx_hash: Union[str, HexBytes], explorer_url: Optional[str] = None) -> bool:
-        total_time = 0
         timeout = 120
-        poll_latency = 10
 
         tx_hash_bytes = HexBytes(tx_hash)  # Приведение к HexBytes
+        tx_link = explorer_url + 'tx/' + tx_hash_bytes.hex() if explorer_url else tx_hash_bytes.hex()
+
+        try:
+            receipt = await self.wait_receipt(tx_hash_bytes, timeout)
+        except asyncio.TimeoutError:
+            cprint(f"⚠️ Транзакция не попала в цепочку после {timeout} секунд", "light_yellow")
+            return False
 
-        while True:
-            try:
-                receipt = await self.w3.eth.get_transaction_receipt(tx_hash_bytes)
-                status = receipt.get("status")
-                if status == 1:
-                    cprint(
-                        f"🎯 Транзакция прошла успешно: "
-                        f"{explorer_url + 'tx/' + tx_hash_bytes.hex() if explorer_url else tx_hash_bytes.hex()}",
-                        "light_green")
-                    return True
-                elif status is None:
-                    await asyncio.sleep(poll_latency)
-                else:
-                    cprint(f"❌ Транзакция не выполнена: "
-                           f"{explorer_url + 'tx/' + tx_hash_bytes.hex() if explorer_url else tx_hash_bytes.hex()}",
-                           "light_red")
-                    return False
-            except TransactionNotFound:
-                if total_time > timeout:
-                    cprint(f"⚠️ Транзакция не попала в цепочку после {timeout} секунд", "light_yellow")
-                    return False
-                total_time += poll_latency
-                await asyncio.sleep(poll_latency)
+        if receipt.get("status") == 1:
+            cprint(f"🎯 Транзакция прошла успешно: {tx_link}", "light_green")
+            return True
+        cprint(f"❌ Транзакция не выполнена: {tx_link}", "light_red")
+        return False
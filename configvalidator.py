@@ -1,9 +1,9 @@
-from eth_utils import decode_hex
-from eth_keys import keys
-import requests
 import json
 import re
 
+# Порядок группы secp256k1: допустимый приватный ключ лежит в (0, N)
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
 
 class ConfigValidator:
     def __init__(self, config_path: str):
@@ -21,36 +21,100 @@ class ConfigValidator:
 
     async def validate_config(self) -> dict:
         """Валидация всех полей конфигурации"""
-        if "private_key" not in self.config_data:
-            print("Ошибка: Отсутствует 'private_key' в конфигурации.")
+        if not self.config_data.get("private_key") and not self.config_data.get("wallets_file"):
+            print("Ошибка: Укажите 'private_key' или 'wallets_file' в конфигурации.")
             exit(1)
 
-        if "network" not in self.config_data:
-            print("Ошибка: Отсутствует 'network' в конфигурации.")
+        if not self.config_data.get("network") and not self.config_data.get("networks"):
+            print("Ошибка: Укажите 'network' или 'networks' в конфигурации.")
             exit(1)
 
-        if "proxy" not in self.config_data:
-            print("Ошибка: Отсутствует 'proxy' в конфигурации.")
+        if not self.config_data.get("proxy") and not self.config_data.get("proxies_file"):
+            print("Ошибка: Укажите 'proxy' или 'proxies_file' в конфигурации.")
             exit(1)
 
         if "amount" not in self.config_data:
             print("Ошибка: Отсутствует 'amount' в конфигурации.")
             exit(1)
 
-        await self.validate_private_key(self.config_data["private_key"])
-        await self.validate_network(self.config_data["network"])
+        if self.config_data.get("wallets_file"):
+            private_keys = await self.load_wallets(self.config_data["wallets_file"])
+        else:
+            private_keys = [self.config_data["private_key"]]
+        for private_key in private_keys:
+            await self.validate_private_key(private_key)
+        self.config_data["private_keys"] = private_keys
+
+        await self.validate_concurrency(self.config_data.get("max_concurrent_wallets", 50))
+        await self.validate_concurrency(self.config_data.get("max_concurrent_per_network", 20))
+        for limit in (self.config_data.get("network_concurrency") or {}).values():
+            await self.validate_concurrency(limit)
+        networks = self.config_data.get("networks") or [self.config_data["network"]]
+        for network in networks:
+            await self.validate_network(network)
+        self.config_data["networks"] = networks
+        if self.config_data.get("signer_processes"):
+            await self.validate_concurrency(self.config_data["signer_processes"])
+        if self.config_data.get("metrics_port") is not None:
+            await self.validate_port(self.config_data["metrics_port"])
+        if self.config_data.get("metrics_host") is not None:
+            await self.validate_host(self.config_data["metrics_host"])
         await self.validate_amount(self.config_data["amount"])
-        await self.validate_proxy(self.config_data["proxy"])
+        for parts in self.config_data.get("route_splits") or []:
+            await self.validate_route_split(parts)
+        if self.config_data.get("console_output", "summary") not in ("summary", "wallets"):
+            print("Ошибка: 'console_output' должен быть 'summary' или 'wallets'.")
+            exit(1)
+        if self.config_data.get("slippage_percent") is not None:
+            await self.validate_slippage(self.config_data["slippage_percent"])
+        if self.config_data.get("proxies_file"):
+            proxies = await self.load_proxies(self.config_data["proxies_file"])
+        else:
+            proxies = [self.config_data["proxy"]]
+        for proxy in proxies:
+            await self.validate_proxy(proxy)
+        self.config_data["proxies"] = proxies
 
         return self.config_data
 
+    @staticmethod
+    async def load_wallets(wallets_file: str) -> list:
+        """Загружает приватные ключи кошельков, по одному на строку"""
+        try:
+            with open(wallets_file, "r", encoding="utf-8") as file:
+                private_keys = [line.strip() for line in file if line.strip()]
+        except FileNotFoundError:
+            print(f"Ошибка: Файл кошельков '{wallets_file}' не найден.")
+            exit(1)
+
+        if not private_keys:
+            print(f"Ошибка: Файл кошельков '{wallets_file}' пуст.")
+            exit(1)
+        return private_keys
+
+    @staticmethod
+    async def load_proxies(proxies_file: str) -> list:
+        """Загружает список прокси, по одному на строку"""
+        try:
+            with open(proxies_file, "r", encoding="utf-8") as file:
+                proxies = [line.strip() for line in file if line.strip()]
+        except FileNotFoundError:
+            print(f"Ошибка: Файл прокси '{proxies_file}' не найден.")
+            exit(1)
+
+        if not proxies:
+            print(f"Ошибка: Файл прокси '{proxies_file}' пуст.")
+            exit(1)
+        return proxies
+
     @staticmethod
     async def validate_private_key(private_key: str) -> None:
-        """Валидация приватного ключа"""
+        """Валидация приватного ключа без вычисления публичного ключа: 32 байта в диапазоне secp256k1"""
         try:
-            private_key_bytes = decode_hex(private_key)
-            _ = keys.PrivateKey(private_key_bytes)
-        except (ValueError, Exception):
+            private_key_bytes = bytes.fromhex(private_key.removeprefix("0x").removeprefix("0X"))
+        except (ValueError, AttributeError):
+            private_key_bytes = b""
+        if len(private_key_bytes) != 32 or not 0 < int.from_bytes(private_key_bytes, "big") < SECP256K1_N:
             print("Ошибка: Некорректный 'private_key' в конфигурации.")
             exit(1)
 
@@ -79,7 +143,7 @@ class ConfigValidator:
 
     @staticmethod
     async def validate_proxy(proxy: str) -> None:
-        """Валидация прокси-адреса"""
+        """Валидация формата прокси-адреса; работоспособность проверяет ProxyPool"""
         pattern = (
             r"^(?P<login>[^:@]+):(?P<password>[^:@]+)@(?P<host>[\w.-]+):(?P<port>\d+)$"
         )
@@ -88,12 +152,6 @@ class ConfigValidator:
             print("Ошибка: Неверный формат прокси! Должен быть 'login:pass@host:port'.")
             exit(1)
 
-        proxy_url = {"http": f"http://{proxy}"}
-        response = requests.get("https://httpbin.org/ip", proxies=proxy_url, timeout=5)
-        if response.status_code != 200:
-            print("Ошибка: 'proxy' нерабочий или вернул неверный статус-код!")
-            exit(1)
-
     @staticmethod
     async def validate_amount(amount: str) -> None:
         """Валидация количества токенов"""
@@ -102,3 +160,38 @@ class ConfigValidator:
         except ValueError:
             print("Ошибка количества токенов! Введите число.")
             exit(1)
+
+    @staticmethod
+    async def validate_concurrency(limit: int) -> None:
+        """Валидация лимита параллельных кошельков"""
+        if not isinstance(limit, int) or limit < 1:
+            print("Ошибка: Лимит параллельности должен быть целым числом больше нуля.")
+            exit(1)
+
+    @staticmethod
+    async def validate_route_split(parts: int) -> None:
+        """Валидация числа частей, на которые делится сумма свапа"""
+        if not isinstance(parts, int) or not 1 <= parts <= 16:
+            print("Ошибка: Значения 'route_splits' должны быть целыми числами от 1 до 16.")
+            exit(1)
+
+    @staticmethod
+    async def validate_slippage(slippage: float) -> None:
+        """Валидация допустимого проскальзывания"""
+        if not isinstance(slippage, (int, float)) or not 0 < slippage <= 50:
+            print("Ошибка: 'slippage_percent' должен быть числом больше 0 и не больше 50.")
+            exit(1)
+
+    @staticmethod
+    async def validate_port(port: int) -> None:
+        """Валидация порта эндпоинта метрик"""
+        if not isinstance(port, int) or not 0 < port < 65536:
+            print("Ошибка: 'metrics_port' должен быть целым числом от 1 до 65535.")
+            exit(1)
+
+    @staticmethod
+    async def validate_host(host: str) -> None:
+        """Валидация адреса эндпоинта метрик"""
+        if not isinstance(host, str) or not host.strip():
+            print("Ошибка: 'metrics_host' должен быть непустой строкой, например \"127.0.0.1\".")
+            exit(1)
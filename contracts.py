@@ -0,0 +1,25 @@
+from typing import Any, Dict, List, Tuple
+from web3.contract import AsyncContract
+from web3 import AsyncWeb3
+import functools
+import json
+
+# Объекты контрактов по (AsyncWeb3, адрес, ABI). Сборка контракта разбирает ABI и стоит около миллисекунды,
+# а AsyncWeb3 и ABI живут всё время процесса; они хранятся рядом с контрактом, чтобы их id не переиспользовались
+_contracts: Dict[Tuple[int, str, int], Tuple[AsyncWeb3, List[Dict[str, Any]], AsyncContract]] = {}
+
+
+# ABI из файла читается один раз за процесс; возвращаемый список общий и не должен изменяться
+@functools.lru_cache(maxsize=None)
+def load_abi(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+# Контракт для пары (сеть, адрес); abi — константа модуля или результат load_abi
+def get_contract(w3: AsyncWeb3, address: str, abi: List[Dict[str, Any]]) -> AsyncContract:
+    key = (id(w3), address, id(abi))
+    entry = _contracts.get(key)
+    if entry is None:
+        entry = _contracts[key] = (w3, abi, w3.eth.contract(address=w3.to_checksum_address(address), abi=abi))
+    return entry[2]
@@ -0,0 +1,99 @@
+from typing import Dict, NamedTuple, Optional
+from web3 import AsyncWeb3
+from termcolor import cprint
+import statistics
+import asyncio
+import time
+
+# Перцентили чаевых из eth_feeHistory
+PERCENTILES = (10, 50, 90)
+FEE_HISTORY_BLOCKS = 10
+FEE_TTL = 3.0
+
+
+class FeeSnapshot(NamedTuple):
+    block_number: int
+    base_fee: int
+    priority_fees: Dict[int, int]
+    max_priority_fee: int
+    gas_price: int
+    fetched_at: float
+
+
+class FeeOracle:
+    """Общие для всех кошельков сети данные о газе, обновляются раз в блок или по TTL"""
+
+    def __init__(self, w3: AsyncWeb3, ttl: float = FEE_TTL) -> None:
+        self.w3 = w3
+        self.ttl = ttl
+        self.snapshot: Optional[FeeSnapshot] = None
+        self._latest_block = 0
+        self._lock = asyncio.Lock()
+
+    def is_fresh(self) -> bool:
+        return (self.snapshot is not None
+                and time.monotonic() - self.snapshot.fetched_at < self.ttl
+                and self.snapshot.block_number >= self._latest_block)
+
+    # Текущие комиссии; одновременные вызовы ждут одно обновление
+    async def get(self) -> FeeSnapshot:
+        if self.is_fresh():
+            return self.snapshot
+        async with self._lock:
+            if not self.is_fresh():
+                self.snapshot = await self.refresh()
+        return self.snapshot
+
+    async def refresh(self) -> FeeSnapshot:
+        # Все четыре запроса уходят одной JSON-RPC пачкой
+        block_number, gas_price, fee_history, max_priority_fee = await asyncio.gather(
+            self.w3.eth.block_number,
+            self.w3.eth.gas_price,
+            self.w3.eth.fee_history(FEE_HISTORY_BLOCKS, "latest", list(PERCENTILES)),
+            self.w3.eth.max_priority_fee,
+            return_exceptions=True,
+        )
+        if isinstance(block_number, Exception):
+            raise block_number
+        if isinstance(gas_price, Exception):
+            raise gas_price
+
+        if isinstance(fee_history, Exception):
+            cprint(f"⚠️ eth_feeHistory недоступен ({fee_history}), используем gas_price", "light_yellow")
+            base_fee = gas_price
+            priority_fees = {percentile: 0 for percentile in PERCENTILES}
+        else:
+            base_fee = fee_history["baseFeePerGas"][-1]
+            rewards = fee_history.get("reward") or [[0] * len(PERCENTILES)]
+            priority_fees = {
+                percentile: int(statistics.median(block[index] for block in rewards))
+                for index, percentile in enumerate(PERCENTILES)
+            }
+
+        if isinstance(max_priority_fee, Exception):
+            max_priority_fee = priority_fees[50]
+
+        self._latest_block = max(self._latest_block, block_number)
+        return FeeSnapshot(
+            block_number=block_number,
+            base_fee=base_fee,
+            priority_fees=priority_fees,
+            max_priority_fee=max_priority_fee,
+            gas_price=gas_price,
+            fetched_at=time.monotonic(),
+        )
+
+    # Сигнал о новом блоке: следующий get() обновит данные
+    def on_new_block(self, block_number: int) -> None:
+        self._latest_block = max(self._latest_block, block_number)
+
+
+# Один оракул на сеть, общий для всех Client; подключение обновляется при смене прокси общих сервисов
+_oracles: Dict[int, FeeOracle] = {}
+
+
+def get_fee_oracle(chain_id: int, w3: AsyncWeb3) -> FeeOracle:
+    if chain_id not in _oracles:
+        _oracles[chain_id] = FeeOracle(w3)
+    _oracles[chain_id].w3 = w3
+    return _oracles[chain_id]
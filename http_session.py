@@ -0,0 +1,55 @@
+from typing import Callable, Dict, Any, Optional
+import aiohttp
+import json
+
+# Общие keep-alive сессии, по одной на каждый прокси
+_sessions: Dict[Optional[str], aiohttp.ClientSession] = {}
+
+POOL_SIZE = 200
+KEEPALIVE_TIMEOUT = 30
+
+
+def proxy_url(proxy: Optional[str]) -> Optional[str]:
+    return f"http://{proxy}" if proxy else None
+
+
+# Получение пула соединений для прокси
+def get_session(proxy: Optional[str] = None) -> aiohttp.ClientSession:
+    session = _sessions.get(proxy)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=POOL_SIZE,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300,
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        _sessions[proxy] = session
+    return session
+
+
+# POST с JSON-телом и JSON-ответом
+async def post_json(url: str, payload: Any, proxy: Optional[str] = None, timeout: float = 15,
+                    dumps: Callable[[Any], str] = json.dumps) -> Any:
+    session = get_session(proxy)
+    async with session.post(url, data=dumps(payload), headers={"Content-Type": "application/json"},
+                            proxy=proxy_url(proxy), timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        response.raise_for_status()
+        return await response.json(content_type=None)
+
+
+# GET, возвращающий только статус-код
+async def get_status(url: str, proxy: Optional[str] = None, timeout: float = 5) -> int:
+    session = get_session(proxy)
+    async with session.get(url, proxy=proxy_url(proxy),
+                           timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        await response.read()
+        return response.status
+
+
+# Закрытие всех сессий перед завершением цикла событий
+async def close_sessions() -> None:
+    sessions = list(_sessions.values())
+    _sessions.clear()
+    for session in sessions:
+        if not session.closed:
+            await session.close()
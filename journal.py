@@ -0,0 +1,202 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from termcolor import cprint
+import asyncio
+import json
+import time
+import os
+
+STAGES = ("approve", "wrap", "swap")
+# Промежуточные части свапа по маршруту: swap_part_0, swap_part_1, ...; последняя часть — этап swap
+SWAP_PART_PREFIX = "swap_part_"
+
+# Как часто и какими пачками записи сбрасываются на диск с fsync
+FLUSH_INTERVAL = 0.2
+FLUSH_SIZE = 200
+
+
+class StageRecord(NamedTuple):
+    status: Optional[str] = None
+    tx_hash: Optional[str] = None
+    # Сумма в wei для части свапа
+    amount: Optional[int] = None
+    # Отмена с тем же nonce: в блок попадёт либо она, либо исходная транзакция
+    cancel_hash: Optional[str] = None
+
+    # Новая запись этапа поверх прежней: незаданные поля сохраняются, новый хэш транзакции сбрасывает отмену
+    def merge(self, status: str, tx_hash: Optional[str] = None, amount: Optional[int] = None,
+              cancel_hash: Optional[str] = None) -> "StageRecord":
+        return StageRecord(
+            status=status,
+            tx_hash=tx_hash or self.tx_hash,
+            amount=amount if amount is not None else self.amount,
+            cancel_hash=cancel_hash or (None if tx_hash else self.cancel_hash),
+        )
+
+
+class WalletJournal:
+    """Записи журнала одного кошелька в одной сети"""
+
+    def __init__(self, journal: "Journal", network: str, address: str,
+                 history: Dict[str, StageRecord]) -> None:
+        self.journal = journal
+        self.network = network
+        self.address = address
+        self.history = history
+
+    def status(self, stage: str) -> Optional[str]:
+        return self.history.get(stage, StageRecord()).status
+
+    def tx_hash(self, stage: str) -> Optional[str]:
+        return self.history.get(stage, StageRecord()).tx_hash
+
+    # Сумма в wei, записанная для части свапа
+    def amount(self, stage: str) -> Optional[int]:
+        return self.history.get(stage, StageRecord()).amount
+
+    def cancel_hash(self, stage: str) -> Optional[str]:
+        return self.history.get(stage, StageRecord()).cancel_hash
+
+    # Этапы в порядке выполнения: approve, wrap, части свапа по номеру, swap
+    def stages(self) -> List[str]:
+        parts = sorted((stage for stage in self.history if stage.startswith(SWAP_PART_PREFIX)),
+                       key=lambda stage: int(stage[len(SWAP_PART_PREFIX):]))
+        return [*STAGES[:-1], *parts, STAGES[-1]]
+
+    # Номер следующей части свапа и сумма уже подтверждённых частей
+    def swap_parts(self) -> Tuple[int, int]:
+        parts = [stage for stage in self.history if stage.startswith(SWAP_PART_PREFIX)]
+        confirmed = sum(self.amount(stage) or 0 for stage in parts if self.is_done(stage))
+        return len(parts), confirmed
+
+    def is_done(self, stage: str) -> bool:
+        return self.status(stage) == "confirmed"
+
+    def record(self, stage: str, status: str, tx_hash: Optional[str] = None, amount: Optional[int] = None,
+               cancel_hash: Optional[str] = None) -> Optional[asyncio.Future]:
+        self.history[stage] = self.history.get(stage, StageRecord()).merge(status, tx_hash, amount, cancel_hash)
+        entry = {
+            "ts": time.time(),
+            "network": self.network,
+            "address": self.address,
+            "stage": stage,
+            "status": status,
+            "tx_hash": tx_hash,
+        }
+        if amount is not None:
+            entry["amount"] = str(amount)
+        if cancel_hash is not None:
+            entry["cancel_hash"] = cancel_hash
+        return self.journal.append(entry, durable=status == "sent")
+
+    # Хэш записывается на диск до отправки транзакции в сеть
+    async def record_sent(self, stage: str, tx_hash: str, amount: Optional[int] = None) -> None:
+        waiter = self.record(stage, "sent", tx_hash, amount)
+        if waiter is not None:
+            await waiter
+
+    # Хэш отмены записывается на диск до её отправки; исходный хэш этапа сохраняется
+    async def record_cancel(self, stage: str, cancel_hash: str) -> None:
+        waiter = self.record(stage, "sent", cancel_hash=cancel_hash)
+        if waiter is not None:
+            await waiter
+
+
+class Journal:
+    """Append-only JSONL журнал этапов и хэшей транзакций для продолжения прогона после падения"""
+
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL, flush_size: int = FLUSH_SIZE) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.state: Dict[Tuple[str, str], Dict[str, StageRecord]] = {}
+        self._buffer: List[str] = []
+        self._waiters: List[asyncio.Future] = []
+        self._file = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+
+    # Восстановление состояния из журнала; битая последняя строка после падения пропускается
+    def load(self) -> int:
+        if not os.path.exists(self.path):
+            return 0
+        count = 0
+        with open(self.path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                history = self.state.setdefault((entry["network"], entry["address"]), {})
+                amount = int(entry["amount"]) if entry.get("amount") else None
+                history[entry["stage"]] = history.get(entry["stage"], StageRecord()).merge(
+                    entry["status"], entry.get("tx_hash"), amount, entry.get("cancel_hash"))
+                count += 1
+        return count
+
+    def wallet(self, network: str, address: str) -> WalletJournal:
+        return WalletJournal(self, network, address, self.state.setdefault((network, address), {}))
+
+    async def start(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._wakeup = asyncio.Event()
+        self._flusher = asyncio.create_task(self._run())
+
+    # durable=True возвращает future, которое завершится после fsync этой записи
+    def append(self, entry: Dict[str, Any], durable: bool = False) -> Optional[asyncio.Future]:
+        self._buffer.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        waiter = None
+        if durable and self._flusher is not None:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            self._wakeup.set()
+        elif len(self._buffer) >= self.flush_size and self._wakeup is not None:
+            self._wakeup.set()
+        return waiter
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except OSError as e:
+                cprint(f"⚠️ Не удалось записать журнал: {e}", "light_red")
+            if self._closing:
+                return
+
+    # Запись накопленных строк и один fsync на пачку, в отдельном потоке; пока идёт fsync, копится следующая
+    async def flush(self) -> None:
+        if not self._buffer or self._file is None:
+            return
+        lines, self._buffer = self._buffer, []
+        waiters, self._waiters = self._waiters, []
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, lines)
+        except Exception as e:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_exception(e)
+            raise
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _write(self, lines: List[str]) -> None:
+        self._file.writelines(lines)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    # Дописать буфер и закрыть файл; сбросом занимается только фоновая задача
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._closing = True
+            self._wakeup.set()
+            await self._flusher
+            self._flusher = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
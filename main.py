@@ -1,238 +1,36 @@
 from configvalidator import ConfigValidator
-from typing import Dict, Any, Optional
-from client import Client
-import requests
+from odos_scheduler import odos_scheduler
+from http_session import close_sessions
+from proxy_pool import ProxyPool
+from wallet_store import ADDRESS_CACHE_FILE, WalletStore
+from networks import get_network
+from results import RESULTS_FILE, ResultsWriter
+from metrics import metrics
+from journal import Journal
+from typing import Dict, Any
+import importlib
+import threading
 import asyncio
 import json
 
+# Модули со стеком web3 импортируются около секунды; импорт идёт в фоне, пока проверяются настройки и прокси
+HEAVY_MODULES = ("batch",)
 
-class Odos:
-    def __init__(self, client: Client) -> None:
-        self.client = client
 
-    # Апрув для Odos
-    async def check_and_approve(self) -> None:
-        try:
-            max_uint256 = 2 ** 256 - 1
-            with open("erc20_abi.json") as f:
-                erc20_abi = json.load(f)
+def preload_modules() -> threading.Thread:
+    def load() -> None:
+        for module in HEAVY_MODULES:
+            importlib.import_module(module)
 
-            contract = await self.client.get_contract(
-                contract_address=self.client.from_address, abi=erc20_abi
-            )
-
-            allowance = await contract.functions.allowance(
-                self.client.address,
-                self.client.router_address
-            ).call()
-
-            if allowance == 0:
-                print("⚠️ Нет апрува! Отправляем approve транзакцию...")
-
-                tx = await contract.functions.approve(
-                    self.client.router_address,
-                    max_uint256
-                ).build_transaction({
-                    "from": self.client.address,
-                    "nonce": await self.client.w3.eth.get_transaction_count(self.client.address),
-                    "gas": 60000,
-                    "gasPrice": await self.client.w3.eth.gas_price,
-                    "chainId": await self.client.w3.eth.chain_id
-                })
-
-                signed_tx = self.client.w3.eth.account.sign_transaction(tx, self.client.private_key)
-                tx_hash = await self.client.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-                print(f"🚀 Отправлена транзакция approve: {tx_hash.hex()}")
-                receipt = await self.client.w3.eth.wait_for_transaction_receipt(tx_hash)
-                print(f"✅ Approve подтвержден: {receipt.transactionHash.hex()}\n")
-            else:
-                print("✅ Approve уже есть, всё ок!\n")
-        except Exception as e:
-            print(f"❌ Ошибка при approve: {e}")
-            exit(1)
-
-    # Врап нативного токена
-    async def wrap_native(self) -> None:
-        try:
-            wrap_abi = [
-                {
-                    "inputs": [],
-                    "name": "deposit",
-                    "outputs": [],
-                    "stateMutability": "payable",
-                    "type": "function"
-                }
-            ]
-            address = self.client.address
-            amount = self.client.to_wei_main(self.client.amount, 18)
-
-            balance = await self.client.w3.eth.get_balance(address)
-            gas_cost = await self.client.get_tx_fee()
-            total_needed = amount + gas_cost
-            if balance < total_needed:
-                print(
-                    f"❌ Недостаточно средств для врапа. Баланс: {self.client.from_wei_main(balance, 18)} ETH, "
-                    f"требуется: {self.client.from_wei_main(total_needed, 18)} ETH (с учётом газа)."
-                )
-                exit(1)
-
-            weth = await self.client.get_contract(contract_address=self.client.from_address, abi=wrap_abi)
-
-            tx = await weth.functions.deposit().build_transaction({
-                "from": address,
-                "value": amount,
-                "nonce": await self.client.w3.eth.get_transaction_count(address),
-                "gas": 100000,
-                "gasPrice": await self.client.w3.eth.gas_price,
-                "chainId": await self.client.w3.eth.chain_id
-            })
-
-            signed_tx = self.client.w3.eth.account.sign_transaction(tx, private_key=self.client.private_key)
-            tx_hash = await self.client.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            print(f"🚀 Отправлена транзакция на врап: {tx_hash.hex()}\n")
-            receipt = await self.client.w3.eth.wait_for_transaction_receipt(tx_hash)
-            print(f"✅ Транзакция на врап подтверждена: {receipt.transactionHash.hex()}\n")
-        except Exception as e:
-            print(f"❌ Ошибка при врапе токена: {e}")
-            exit(1)
-
-    # Получение quote через Odos API
-    async def get_quote(self) -> Dict[str, Any]:
-        try:
-            url = "https://api.odos.xyz/sor/quote/v2"
-            amount = self.client.amount
-            params = {
-                "chainId": self.client.chain_id,
-                "inputTokens": [
-                    {
-                        "tokenAddress": str(self.client.from_address),
-                        "amount": str(self.client.to_wei_main(amount, 18)),
-                    }
-                ],
-                "outputTokens": [
-                    {
-                        "tokenAddress": f"{self.client.to_address}",
-                        "proportion": 1
-                    }
-                ],
-                "slippageLimitPercent": 0.5,
-                "userAddr": self.client.address
-            }
-
-            proxies = {
-                "http": f"http://{self.client.proxy}",
-                "https": f"http://{self.client.proxy}"
-            }
-
-            try:
-                response = requests.post(url, json=params, proxies=proxies, timeout=15)
-                response.raise_for_status()
-            except requests.exceptions.Timeout:
-                print("⏱️ Превышено время ожидания ответа от Odos API.")
-                exit(1)
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Ошибка при обращении к Odos API: {e}")
-                exit(1)
-            return response.json()
-
-        except requests.RequestException as e:
-            print(f"❌ Ошибка получения котировки: {e}")
-            exit(1)
-
-    # Построение calldata через assemble
-    async def assemble(self, quote: Dict[str, Any]) -> Dict[str, Any]:
-        try:
-            assemble_url = "https://api.odos.xyz/sor/assemble"
-            assemble_request_body = {
-                "pathId": quote["pathId"],
-                "userAddr": str(self.client.address)
-            }
-
-            proxies = {
-                "http": f"http://{self.client.proxy}",
-                "https": f"http://{self.client.proxy}"
-            }
-            try:
-                response = requests.post(
-                    assemble_url,
-                    headers={"Content-Type": "application/json"},
-                    json=assemble_request_body,
-                    proxies=proxies,
-                    timeout=15
-                )
-
-                response.raise_for_status()
-            except requests.exceptions.Timeout:
-                print("⏱️ Превышено время ожидания ответа от Odos API.")
-                exit(1)
-            except requests.exceptions.RequestException as e:
-                print(f"❌ Ошибка при обращении к Odos API: {e}")
-                exit(1)
-            return response.json()
-
-        except requests.RequestException as e:
-            print(f"❌ Ошибка сборки транзакции: {e}")
-            exit(1)
-
-    # Отправка транзакции на свап
-    async def swap(self, build_data: Dict[str, Any]) -> Optional[str]:
-        try:
-            amount = self.client.to_wei_main(self.client.amount, 18)
-
-            balance = await self.client.get_erc20_balance()
-            gas_cost = await self.client.get_tx_fee()
-            total_needed = amount + gas_cost
-            if balance < total_needed:
-                print(
-                    f"❌ Недостаточно средств для свапа. Баланс: {self.client.from_wei_main(balance, 18)} ETH, "
-                    f"требуется: {self.client.from_wei_main(total_needed, 18)} ETH (с учётом газа)."
-                )
-                exit(1)
-
-            tx_data = build_data["transaction"]
-
-            tx = {
-                "to": tx_data["to"],
-                "from": tx_data["from"],
-                "value": 0,
-                "data": tx_data["data"],
-                "chainId": tx_data["chainId"],
-                "gas": tx_data["gas"],
-                "gasPrice": tx_data["gasPrice"],
-                "nonce": tx_data["nonce"],
-            }
-
-            signed_tx = self.client.w3.eth.account.sign_transaction(tx, self.client.private_key)
-            print("✅ Транзакция успешно подписана!\n")
-            tx_hash = await self.client.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            print("✅ Транзакция успешно отправлена!\n")
-            return tx_hash.hex()
-        except Exception as e:
-            print(f"❌ Ошибка при отправке транзакции: {e}")
-            exit(1)
-
-    # Функция сборки для выполнения всех модулей
-    async def execute(self) -> None:
-        await self.check_and_approve()
-        await self.wrap_native()
-        await asyncio.sleep(0.5)
-        quote = await self.get_quote()
-        await asyncio.sleep(0.5)
-        build_data = await self.assemble(quote)
-        await asyncio.sleep(0.5)
-        tx_hash = await self.swap(build_data)
-        if tx_hash:
-            print(f"🔁 Ожидание подтверждения транзакции: {tx_hash}\n")
-            await asyncio.sleep(0.5)
-            await self.client.wait_tx(tx_hash, self.client.explorer_url)
+    thread = threading.Thread(target=load, name="preload", daemon=True)
+    thread.start()
+    return thread
 
 
 # Подгрузка всех параметров
 async def load_data(network_: str) -> Dict[str, Any]:
     try:
-        with open("networks_data.json", "r", encoding="utf-8") as file:
-            networks_data = json.load(file)
-        return networks_data[network_]
+        return get_network(network_)
     except FileNotFoundError:
         print(f"⚠️ Файл 'networks_data.json' не найден!")
         exit(1)
@@ -247,30 +45,78 @@ async def load_data(network_: str) -> Dict[str, Any]:
 # Основная функция
 async def main() -> None:
     print(f"⚡️ Запуск скрипта...\n")
-    await asyncio.sleep(1)
+    preloader = preload_modules()
 
     print(f"🛠️ Импорт параметров...\n")
     validator = ConfigValidator("settings.json")
     settings = await validator.validate_config()
-    network = settings["network"]
-    network_data = await load_data(network)
+    networks = {network: await load_data(network) for network in settings["networks"]}
 
-    print(f"🛠️ Инициализация клиента...\n")
-    w3_client = Client(
-        router_address=network_data["router_address"],
-        from_address=network_data["from_address"],
-        explorer_url=network_data["explorer_url"],
-        to_address=network_data["to_address"],
-        private_key=settings["private_key"],
-        chain_id=network_data["chain_id"],
-        rpc_url=network_data["rpc_url"],
+    print(f"🛠️ Проверка {len(settings['proxies'])} прокси...\n")
+    proxy_pool = ProxyPool(settings["proxies"])
+    if not await proxy_pool.check_all():
+        print("Ошибка: Ни один прокси не работает!")
+        await close_sessions()
+        exit(1)
+    print(f"{proxy_pool.stats()}\n")
+
+    journal = Journal(settings.get("journal_file") or "journal.jsonl")
+    restored = journal.load()
+    if restored:
+        print(f"📒 Журнал: восстановлено {restored} записей, продолжаем с места остановки\n")
+    await journal.start()
+    await metrics.start(settings.get("metrics_file"), settings.get("metrics_port"), settings.get("metrics_host"))
+    results = ResultsWriter(settings.get("results_file") or RESULTS_FILE)
+    await results.start()
+
+    print(f"🛠️ Инициализация клиентов...\n")
+    odos_scheduler.configure(
+        global_rps=settings.get("odos_rps", 10),
+        proxy_rps=settings.get("odos_rps_per_proxy", 3),
+    )
+    store = WalletStore.load(settings["private_keys"], settings.get("address_cache_file") or ADDRESS_CACHE_FILE)
+    # Ошибка фонового импорта повторится здесь с обычным traceback
+    await asyncio.to_thread(preloader.join)
+    from batch import BatchRunner
+    from odos import SLIPPAGE_PERCENT
+
+    signer = None
+    if settings.get("signer_processes"):
+        from signer import ProcessSigner
+        signer = ProcessSigner(store, settings["signer_processes"])
+        await signer.warm_up()
+    quiet = settings.get("console_output", "summary") == "summary"
+    runner = BatchRunner(
         amount=settings["amount"],
-        proxy=settings["proxy"],
+        proxy_pool=proxy_pool,
+        max_concurrent_wallets=settings.get("max_concurrent_wallets", 50),
+        max_concurrent_per_network=settings.get("max_concurrent_per_network", 20),
+        pipeline=settings.get("pipeline", False),
+        max_price_impact=settings.get("max_price_impact"),
+        network_limits=settings.get("network_concurrency"),
+        journal=journal,
+        signer=signer,
+        preflight=settings.get("preflight", False),
+        route_splits=settings.get("route_splits"),
+        route_alternates=settings.get("route_alternates", False),
+        slippage=settings.get("slippage_percent", SLIPPAGE_PERCENT),
+        results=results,
+        quiet=quiet,
+        progress_interval=1 if quiet else 5,
     )
-    odos_client = Odos(w3_client)
 
-    print(f"🛠️ Подготовка свапа...\n")
-    await odos_client.execute()
+    print(f"🛠️ Подготовка свапа для {len(settings['private_keys'])} кошельков в сетях: {', '.join(networks)}...\n")
+    try:
+        stats = await runner.run(networks, store)
+    finally:
+        await journal.close()
+        await results.close()
+        await metrics.close()
+        if signer is not None:
+            signer.close()
+        await close_sessions()
+    if stats.failed:
+        exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,226 @@
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, List, Optional, TypeVar
+from collections import Counter, deque
+from contextvars import ContextVar
+import functools
+import asyncio
+import inspect
+import json
+import time
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Границы корзин гистограммы длительностей, секунды
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Сколько последних длительностей этапа хранится для перцентилей
+SAMPLES = 2048
+FLUSH_INTERVAL = 1.0
+# Адрес эндпоинта /metrics, если в настройках не задан metrics_host
+DEFAULT_HOST = "127.0.0.1"
+# Имя метки счётчика в выводе Prometheus
+COUNTER_LABELS = {
+    "rpc_calls": "method",
+    "rpc_http_requests": "endpoint",
+    "rpc_http_errors": "endpoint",
+    "http_retries": "target",
+}
+
+# Суммарные длительности этапов текущего кошелька; BatchRunner задаёт словарь на время обработки кошелька,
+# и задачи, созданные внутри, видят тот же словарь
+wallet_stages: ContextVar[Optional[Dict[str, float]]] = ContextVar("wallet_stages", default=None)
+
+
+class StageStats:
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.samples: Deque[float] = deque(maxlen=SAMPLES)
+
+    def observe(self, duration: float, ok: bool) -> None:
+        self.count += 1
+        self.total += duration
+        self.samples.append(duration)
+        if not ok:
+            self.errors += 1
+        for index, bound in enumerate(BUCKETS):
+            if duration <= bound:
+                self.buckets[index] += 1
+                break
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))]
+
+
+class Span:
+    """Замер одного этапа: with metrics.span("approve"): ..."""
+
+    __slots__ = ("metrics", "stage", "started")
+
+    def __init__(self, metrics: "Metrics", stage: str) -> None:
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self) -> "Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        error = exc_type.__name__ if exc_type is not None else None
+        self.metrics.observe(self.stage, time.perf_counter() - self.started, error)
+
+
+class Metrics:
+    """Длительности этапов и счётчики вызовов; вывод в JSONL и в формате Prometheus"""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, StageStats] = {}
+        self.counters: Counter = Counter()
+        self._file = None
+        self._buffer: List[str] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._server: Optional["web.AppRunner"] = None
+
+    def reset(self) -> None:
+        self.stages = {}
+        self.counters = Counter()
+
+    def span(self, stage: str) -> Span:
+        return Span(self, stage)
+
+    def observe(self, stage: str, duration: float, error: Optional[str] = None) -> None:
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.observe(duration, error is None)
+        stages = wallet_stages.get()
+        if stages is not None:
+            stages[stage] = stages.get(stage, 0.0) + duration
+        if self._file is not None:
+            self._buffer.append(json.dumps({
+                "ts": round(time.time(), 3), "type": "span", "stage": stage,
+                "duration": round(duration, 6), "error": error,
+            }))
+
+    # Счётчик с одной меткой, например count("rpc_calls", "eth_call")
+    def count(self, name: str, label: str = "", value: int = 1) -> None:
+        self.counters[(name, label)] += value
+
+    def counter(self, name: str) -> Dict[str, int]:
+        return {label: value for (counter, label), value in self.counters.items() if counter == name}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "stages": {
+                stage: {
+                    "count": stats.count,
+                    "errors": stats.errors,
+                    "avg": round(stats.total / stats.count, 6) if stats.count else 0.0,
+                    "p50": round(stats.percentile(50), 6),
+                    "p95": round(stats.percentile(95), 6),
+                    "p99": round(stats.percentile(99), 6),
+                }
+                for stage, stats in self.stages.items()
+            },
+            "counters": {f"{name}{{{label}}}" if label else name: value
+                         for (name, label), value in sorted(self.counters.items())},
+        }
+
+    # Текст для Prometheus: гистограммы этапов и счётчики
+    def prometheus(self) -> str:
+        lines = ["# TYPE odos_stage_duration_seconds histogram"]
+        for stage, stats in self.stages.items():
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, stats.buckets):
+                cumulative += bucket
+                lines.append(f'odos_stage_duration_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'odos_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {stats.count}')
+            lines.append(f'odos_stage_duration_seconds_sum{{stage="{stage}"}} {stats.total}')
+            lines.append(f'odos_stage_duration_seconds_count{{stage="{stage}"}} {stats.count}')
+        lines.append("# TYPE odos_stage_errors_total counter")
+        for stage, stats in self.stages.items():
+            lines.append(f'odos_stage_errors_total{{stage="{stage}"}} {stats.errors}')
+
+        names = sorted({name for name, _ in self.counters})
+        for name in names:
+            lines.append(f"# TYPE odos_{name}_total counter")
+            for label, value in sorted(self.counter(name).items()):
+                labels = f'{{{COUNTER_LABELS.get(name, "label")}="{label}"}}' if label else ""
+                lines.append(f"odos_{name}_total{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+    # Запись событий в JSONL файл раз в FLUSH_INTERVAL
+    async def start(self, path: Optional[str] = None, port: Optional[int] = None,
+                    host: Optional[str] = None) -> None:
+        if path:
+            self._file = open(path, "a", encoding="utf-8")
+            self._flusher = asyncio.create_task(self._run())
+        if port:
+            await self.serve(port, host or DEFAULT_HOST)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer or self._file is None:
+            return
+        lines, self._buffer = self._buffer, []
+        self._file.write("\n".join(lines) + "\n")
+        self._file.flush()
+
+    # HTTP эндпоинт /metrics для Prometheus; по умолчанию доступен только с этой машины
+    async def serve(self, port: int, host: str = DEFAULT_HOST) -> None:
+        # aiohttp.web нужен только с включённым эндпоинтом
+        from aiohttp import web
+
+        async def handle(_: web.Request) -> web.Response:
+            return web.Response(text=self.prometheus(), content_type="text/plain")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        self._server = web.AppRunner(app, access_log=None)
+        await self._server.setup()
+        await web.TCPSite(self._server, host, port).start()
+
+    # Итоговая сводка в конец файла и остановка
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        if self._file is not None:
+            self._buffer.append(json.dumps({"ts": round(time.time(), 3), "type": "summary", **self.snapshot()}))
+            self.flush()
+            self._file.close()
+            self._file = None
+        if self._server is not None:
+            await self._server.cleanup()
+            self._server = None
+
+
+metrics = Metrics()
+
+
+# Декоратор: замер каждого вызова функции или корутины как этапа stage
+def timed(stage: str) -> Callable[[F], F]:
+    def decorator(func: F) -> F:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with Span(metrics, stage):
+                    return await func(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with Span(metrics, stage):
+                return func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
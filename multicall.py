@@ -0,0 +1,104 @@
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from eth_utils import function_signature_to_4byte_selector
+from eth_abi import decode, encode
+from contracts import get_contract
+from web3 import AsyncWeb3
+import asyncio
+
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"}
+                ],
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"}
+                ],
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+BALANCE_OF = function_signature_to_4byte_selector("balanceOf(address)")
+ALLOWANCE = function_signature_to_4byte_selector("allowance(address,address)")
+DECIMALS = function_signature_to_4byte_selector("decimals()")
+GET_ETH_BALANCE = function_signature_to_4byte_selector("getEthBalance(address)")
+
+# Сколько вызовов уходит в один eth_call
+CHUNK_SIZE = 500
+
+
+class WalletState(NamedTuple):
+    allowance: int
+    token_balance: int
+    native_balance: int
+    decimals: int
+
+
+class Multicall:
+    def __init__(self, w3: AsyncWeb3, address: str = MULTICALL3_ADDRESS, chunk_size: int = CHUNK_SIZE) -> None:
+        self.w3 = w3
+        self.address = w3.to_checksum_address(address)
+        self.chunk_size = chunk_size
+        self.contract = get_contract(w3, self.address, MULTICALL3_ABI)
+
+    # Выполнение вызовов пачками; неуспешный вызов возвращает None
+    async def aggregate(self, calls: Sequence[Tuple[str, bytes]]) -> List[Optional[bytes]]:
+        chunks = [calls[i:i + self.chunk_size] for i in range(0, len(calls), self.chunk_size)]
+        results = await asyncio.gather(*(self._aggregate_chunk(chunk) for chunk in chunks))
+        return [item for chunk in results for item in chunk]
+
+    async def _aggregate_chunk(self, calls: Sequence[Tuple[str, bytes]]) -> List[Optional[bytes]]:
+        response = await self.contract.functions.aggregate3(
+            [(target, True, call_data) for target, call_data in calls]
+        ).call()
+        return [bytes(data) if success else None for success, data in response]
+
+    # Allowance, балансы и decimals для списка кошельков за минимум eth_call
+    async def read_wallet_states(self, token_address: str, spender: str,
+                                 addresses: Sequence[str]) -> Dict[str, WalletState]:
+        token = self.w3.to_checksum_address(token_address)
+        spender = self.w3.to_checksum_address(spender)
+
+        calls: List[Tuple[str, bytes]] = [(token, DECIMALS)]
+        for address in addresses:
+            calls.append((token, ALLOWANCE + encode(["address", "address"], [address, spender])))
+            calls.append((token, BALANCE_OF + encode(["address"], [address])))
+            calls.append((self.address, GET_ETH_BALANCE + encode(["address"], [address])))
+
+        results = await self.aggregate(calls)
+        decimals = _decode_uint(results[0], "decimals")
+
+        states = {}
+        for index, address in enumerate(addresses):
+            allowance, token_balance, native_balance = results[1 + index * 3: 4 + index * 3]
+            states[address] = WalletState(
+                allowance=_decode_uint(allowance, "allowance"),
+                token_balance=_decode_uint(token_balance, "balanceOf"),
+                native_balance=_decode_uint(native_balance, "getEthBalance"),
+                decimals=decimals,
+            )
+        return states
+
+
+def _decode_uint(data: Optional[bytes], name: str) -> int:
+    if not data:
+        raise RuntimeError(f"Multicall: вызов {name} завершился ошибкой")
+    return decode(["uint256"], data)[0]
@@ -0,0 +1,24 @@
+from typing import Any, Dict
+import functools
+import json
+
+NETWORKS_FILE = "networks_data.json"
+
+
+# Таблица сетей разбирается один раз за процесс и приводится к одному формату: список RPC узлов
+# вместо старого rpc_url. Загрузка не тянет web3, поэтому ошибки в файле видны до тяжёлых импортов
+@functools.lru_cache(maxsize=None)
+def network_table(path: str = NETWORKS_FILE) -> Dict[str, Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as file:
+        networks_data = json.load(file)
+    for network_data in networks_data.values():
+        # Старый формат с одним узлом
+        if "rpc_urls" not in network_data:
+            network_data["rpc_urls"] = [network_data["rpc_url"]]
+    return networks_data
+
+
+# Параметры одной сети; копия, чтобы вызывающий код не менял общую таблицу
+def get_network(network: str, path: str = NETWORKS_FILE) -> Dict[str, Any]:
+    network_data = network_table(path)[network]
+    return {**network_data, "rpc_urls": list(network_data["rpc_urls"])}
@@ -0,0 +1,50 @@
+from typing import Dict, Tuple
+from web3 import AsyncWeb3
+import asyncio
+
+NONCE_ERRORS = (
+    "nonce too low",
+    "replacement underpriced",
+    "replacement transaction underpriced",
+)
+
+
+class NonceManager:
+    """Локальная выдача nonce: pending nonce берётся из сети один раз, дальше считается здесь"""
+
+    def __init__(self) -> None:
+        self._nonces: Dict[Tuple[int, str], int] = {}
+        self._locks: Dict[Tuple[int, str], asyncio.Lock] = {}
+
+    def _lock(self, key: Tuple[int, str]) -> asyncio.Lock:
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    # Следующий nonce для адреса
+    async def next_nonce(self, w3: AsyncWeb3, chain_id: int, address: str) -> int:
+        key = (chain_id, address)
+        async with self._lock(key):
+            if key not in self._nonces:
+                self._nonces[key] = await w3.eth.get_transaction_count(address, "pending")
+            nonce = self._nonces[key]
+            self._nonces[key] = nonce + 1
+            return nonce
+
+    # Пересинхронизация с сетью после ошибки nonce
+    async def resync(self, w3: AsyncWeb3, chain_id: int, address: str) -> None:
+        key = (chain_id, address)
+        async with self._lock(key):
+            self._nonces[key] = await w3.eth.get_transaction_count(address, "pending")
+
+    # Сброс: следующий запрос снова возьмёт nonce из сети
+    def invalidate(self, chain_id: int, address: str) -> None:
+        self._nonces.pop((chain_id, address), None)
+
+    @staticmethod
+    def is_nonce_error(error: Exception) -> bool:
+        message = str(error).lower()
+        return any(pattern in message for pattern in NONCE_ERRORS)
+
+
+nonce_manager = NonceManager()
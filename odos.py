@@ -0,0 +1,681 @@
+from http_session import post_json
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+from web3.contract import AsyncContract
+from web3.types import TxParams, TxReceipt
+from hexbytes import HexBytes
+from web3.exceptions import ContractLogicError, TransactionNotFound
+from odos_scheduler import PRIORITY_ASSEMBLE, PRIORITY_QUOTE, odos_scheduler
+from quote_cache import quote_cache
+from proxy_pool import ProxyPool
+from journal import SWAP_PART_PREFIX, WalletJournal
+from route_planner import RoutePlan, RouteSearch, candidates, choose
+from multicall import WalletState
+from metrics import metrics, timed
+from contracts import load_abi
+from client import Client
+import aiohttp
+import asyncio
+import time
+
+
+ODOS_API_URL = "https://api.odos.xyz"
+SLIPPAGE_PERCENT = 0.5
+# Код JSON-RPC для revert и сообщения узла об отказе исполнить транзакцию
+EXECUTION_REVERTED_CODE = 3
+EXECUTION_ERRORS = (
+    "execution reverted",
+    "insufficient funds",
+    "gas required exceeds",
+    "intrinsic gas",
+)
+
+
+class SwapError(Exception):
+    """Ошибка одного из этапов свапа, не завершающая весь прогон"""
+
+
+class PreflightError(SwapError):
+    """Кошелёк отсеян предварительной проверкой до подписи транзакций"""
+
+
+class InsufficientFundsError(SwapError):
+    """На кошельке не хватает токена для этапа или нативного токена на газ"""
+
+
+# Узел выполнил вызов и отказал: revert или ответ JSON-RPC с ошибкой исполнения (нехватка средств, газа).
+# Ошибки сети, таймауты, 503 и лимиты узла (-32005, -32029, 429) сюда не относятся — по ним ничего
+# не известно о самой транзакции
+def is_execution_error(error: BaseException) -> bool:
+    if isinstance(error, ContractLogicError):
+        return True
+    if type(error) is not ValueError or not error.args or not isinstance(error.args[0], dict):
+        return False
+    rpc_error = error.args[0]
+    if rpc_error.get("code") == EXECUTION_REVERTED_CODE:
+        return True
+    message = str(rpc_error.get("message", "")).lower()
+    return any(pattern in message for pattern in EXECUTION_ERRORS)
+
+
+WRAP_ABI = [
+    {
+        "inputs": [],
+        "name": "deposit",
+        "outputs": [],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+
+class Odos:
+    def __init__(self, client: Client, max_price_impact: Optional[float] = None,
+                 proxy_pool: Optional[ProxyPool] = None, journal: Optional[WalletJournal] = None,
+                 api_url: str = ODOS_API_URL, preflight: bool = False, route: Optional[RouteSearch] = None,
+                 slippage: float = SLIPPAGE_PERCENT) -> None:
+        self.client = client
+        self.api_url = api_url
+        self.preflight_enabled = preflight
+        self.route = route
+        self.slippage = slippage
+        self.max_price_impact = max_price_impact
+        self.proxy_pool = proxy_pool
+        self.journal = journal
+        self.resumed = bool(journal and journal.history)
+        # Итог кошелька для файла результатов: (этап, хэш) отправленных транзакций и суммы свапа в wei
+        self.transactions: List[Tuple[str, str]] = []
+        self.amount_in = 0
+        self.amount_out = 0
+
+    # Колбэк для send_tx: хэш (и сумма части свапа) попадает в журнал до отправки транзакции
+    def on_signed(self, stage: str, amount_wei: Optional[int] = None) -> Callable[[HexBytes], Awaitable[None]]:
+        async def record(tx_hash: HexBytes) -> None:
+            if self.journal is not None:
+                await self.journal.record_sent(stage, tx_hash.hex(), amount_wei)
+        return record
+
+    # Подпись и отправка транзакции этапа. Если узел её не принял, этап в журнале помечается неотправленным,
+    # чтобы следующий запуск не ждал хэш, которого нет в сети. В итог кошелька попадает только принятый хэш,
+    # без подписей, заменённых после пересинхронизации nonce
+    async def send_stage(self, stage: str, tx: TxParams, amount_wei: Optional[int] = None) -> HexBytes:
+        try:
+            tx_hash = await self.client.send_tx(tx, self.on_signed(stage, amount_wei))
+        except Exception:
+            self.record_stage(stage, "unsent")
+            raise
+        self.transactions.append((stage, tx_hash.hex()))
+        return tx_hash
+
+    # Суммы свапа, подтверждённого в сети (квитанция со status == 1); выход — по котировке
+    def record_swap(self, quote: Dict[str, Any]) -> None:
+        self.amount_in += int(quote["inAmounts"][0])
+        self.amount_out += int(quote["outAmounts"][0])
+
+    def record_stage(self, stage: str, status: str) -> None:
+        if self.journal is not None:
+            self.journal.record(stage, status)
+
+    def is_done(self, stage: str) -> bool:
+        return self.journal is not None and self.journal.is_done(stage)
+
+    # Досмотр транзакций, отправленных до перезапуска, вместо их повторной отправки.
+    # Если этап отменялся, в блок попадёт либо исходная транзакция, либо отмена: этап готов только в первом случае
+    @timed("resume")
+    async def resume_pending(self) -> None:
+        if self.journal is None:
+            return
+        for stage in self.journal.stages():
+            if self.journal.status(stage) != "sent":
+                continue
+            tx_hash, cancel_hash = self.journal.tx_hash(stage), self.journal.cancel_hash(stage)
+            tx_hashes = [tx_hash, cancel_hash] if cancel_hash else [tx_hash]
+            print(f"🔁 Проверяем транзакцию {stage} из журнала: {', '.join(tx_hashes)}")
+            try:
+                receipt = await self.wait_first_receipt(tx_hashes, timeout=60)
+            except asyncio.TimeoutError:
+                receipt = None
+                for pending_hash in tx_hashes:
+                    receipt = await self.recheck_timed_out(stage, pending_hash)
+                    if receipt is not None:
+                        break
+            if receipt is None:
+                print(f"⚠️ Транзакция {stage} из журнала не попала в сеть, этап будет повторён")
+                self.record_stage(stage, "lost")
+            elif cancel_hash and HexBytes(receipt.transactionHash) == HexBytes(cancel_hash):
+                print(f"🛑 В блок попала отмена транзакции {stage}, этап будет повторён")
+                self.record_stage(stage, "cancelled")
+            else:
+                self.record_stage(stage, "confirmed" if receipt.status == 1 else "failed")
+
+    # Квитанция первой включённой в блок из транзакций с одним nonce; ожидание остальных снимается
+    async def wait_first_receipt(self, tx_hashes: List[str], timeout: float) -> TxReceipt:
+        if len(tx_hashes) == 1:
+            return await self.client.wait_receipt(tx_hashes[0], timeout=timeout)
+        tasks = [asyncio.ensure_future(self.client.wait_receipt(tx_hash, timeout=timeout)) for tx_hash in tx_hashes]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                try:
+                    return await next_done
+                except asyncio.TimeoutError:
+                    continue
+            raise asyncio.TimeoutError()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # Транзакция из журнала не подтвердилась за время ожидания. Этап повторяется, только если узел её не знает
+    # или её nonce уже занят другой транзакцией; если она ещё ждёт в мемпуле, кошелёк пропускается до следующего запуска
+    async def recheck_timed_out(self, stage: str, tx_hash: str) -> Optional[TxReceipt]:
+        try:
+            tx = await self.client.w3.eth.get_transaction(tx_hash)
+        except TransactionNotFound:
+            return None
+        if tx.get("blockNumber") is not None:
+            return await self.client.w3.eth.get_transaction_receipt(tx_hash)
+        confirmed_nonce = await self.client.w3.eth.get_transaction_count(self.client.address, "latest")
+        if tx["nonce"] >= confirmed_nonce:
+            raise SwapError(f"❌ Транзакция {stage} из журнала ещё ждёт включения в блок (nonce {tx['nonce']}), "
+                            f"повторная отправка отложена до следующего запуска")
+        return None
+
+    # Контракт входного токена с полным ERC20 ABI
+    async def get_token_contract(self) -> AsyncContract:
+        return await self.client.get_contract(
+            contract_address=self.client.from_address, abi=load_abi("erc20_abi.json")
+        )
+
+    # Вызов approve без nonce и газа: основа транзакции и её симуляции
+    def approve_call(self, contract: AsyncContract) -> TxParams:
+        max_uint256 = 2 ** 256 - 1
+        return {
+            "from": self.client.address,
+            "to": contract.address,
+            "value": 0,
+            "data": contract.encodeABI(fn_name="approve", args=[self.client.router_address, max_uint256]),
+        }
+
+    # Вызов deposit для врапа без nonce и газа
+    async def wrap_call(self) -> TxParams:
+        weth = await self.client.get_contract(contract_address=self.client.from_address, abi=WRAP_ABI)
+        return {
+            "from": self.client.address,
+            "to": weth.address,
+            "value": self.client.to_wei_main(self.client.amount, 18),
+            "data": weth.encodeABI(fn_name="deposit"),
+        }
+
+    # Вызов свапа из ответа assemble без nonce и газа
+    @staticmethod
+    def swap_call(build_data: Dict[str, Any]) -> TxParams:
+        tx_data = build_data["transaction"]
+        return {
+            "from": tx_data["from"],
+            "to": tx_data["to"],
+            "value": 0,
+            "data": tx_data["data"],
+        }
+
+    # Сборка approve транзакции без отправки
+    async def build_approve_tx(self, contract: AsyncContract) -> TxParams:
+        return {
+            **self.approve_call(contract),
+            "nonce": await self.client.get_nonce(),
+            "gas": 60000,
+            "gasPrice": await self.client.get_gas_price(),
+            "chainId": await self.client.get_chain_id()
+        }
+
+    # Сборка транзакции врапа без отправки
+    async def build_wrap_tx(self) -> TxParams:
+        return {
+            **await self.wrap_call(),
+            "nonce": await self.client.get_nonce(),
+            "gas": 100000,
+            "gasPrice": await self.client.get_gas_price(),
+            "chainId": await self.client.get_chain_id()
+        }
+
+    # Сборка транзакции свапа из ответа assemble
+    async def build_swap_tx(self, build_data: Dict[str, Any]) -> TxParams:
+        tx_data = build_data["transaction"]
+
+        return {
+            **self.swap_call(build_data),
+            "chainId": tx_data["chainId"],
+            "gas": tx_data["gas"],
+            "gasPrice": tx_data["gasPrice"],
+            "nonce": await self.client.get_nonce(),
+        }
+
+    # Симуляция вызова через eth_call и estimate_gas на pending состоянии; вызовы разных кошельков
+    # уходят общей JSON-RPC пачкой
+    async def simulate(self, stage: str, call: TxParams, gas_limit: Optional[int] = None) -> int:
+        result, gas = await asyncio.gather(
+            self.client.w3.eth.call(call, "pending"),
+            self.client.w3.eth.estimate_gas(call, "pending"),
+            return_exceptions=True,
+        )
+        # Сбой транспорта — обычная ошибка кошелька, его можно повторить; no-go только по ответу узла
+        for outcome in (result, gas):
+            if isinstance(outcome, Exception) and not is_execution_error(outcome):
+                raise outcome
+        for outcome in (result, gas):
+            if isinstance(outcome, Exception):
+                raise PreflightError(f"⛔ Предварительная проверка {stage}: {outcome}")
+        if gas_limit is not None and gas > gas_limit:
+            raise PreflightError(
+                f"⛔ Предварительная проверка {stage}: нужно {gas} газа, лимит транзакции {gas_limit}")
+        return gas
+
+    # Go/no-go до подписи: нативный баланс и симуляция врапа и апрува.
+    # Если врап по журналу уже подтверждён, нативный баланс нужен только на газ
+    @timed("preflight")
+    async def preflight(self, state: WalletState) -> None:
+        wrapped = self.is_done("wrap")
+        try:
+            gas_cost = await self.client.get_tx_fee()
+            if not wrapped:
+                await self.check_native_balance(state.native_balance, gas_cost)
+            elif state.native_balance < gas_cost:
+                raise InsufficientFundsError(
+                    f"❌ Недостаточно средств на газ. Баланс: {self.client.from_wei_main(state.native_balance, 18)} "
+                    f"ETH, требуется: {self.client.from_wei_main(gas_cost, 18)} ETH."
+                )
+        except SwapError as e:
+            metrics.count("preflight_nogo")
+            raise PreflightError(str(e)) from e
+
+        simulations = [] if wrapped else [self.simulate("wrap", await self.wrap_call(), 100000)]
+        if state.allowance == 0 and not self.is_done("approve"):
+            contract = await self.get_token_contract()
+            simulations.append(self.simulate("approve", self.approve_call(contract), 60000))
+        try:
+            await asyncio.gather(*simulations)
+        except PreflightError:
+            metrics.count("preflight_nogo")
+            raise
+
+    # Симуляция собранного свапа. В конвейере она возможна, только если апрув и токены уже есть:
+    # иначе свап зависит от ещё не включённых в блок транзакций
+    @timed("preflight_swap")
+    async def preflight_swap(self, build_data: Dict[str, Any], state: Optional[WalletState] = None) -> None:
+        amount = self.client.to_wei_main(self.client.amount, 18)
+        if state is not None and (state.allowance == 0 or state.token_balance < amount):
+            return
+        try:
+            await self.simulate("swap", self.swap_call(build_data), build_data["transaction"]["gas"])
+        except PreflightError:
+            metrics.count("preflight_nogo")
+            raise
+
+    # Проверка, что нативного баланса хватает на врап и газ
+    async def check_native_balance(self, balance: int, gas_cost: int) -> None:
+        total_needed = self.client.to_wei_main(self.client.amount, 18) + gas_cost
+        if balance < total_needed:
+            raise InsufficientFundsError(
+                f"❌ Недостаточно средств для врапа. Баланс: {self.client.from_wei_main(balance, 18)} ETH, "
+                f"требуется: {self.client.from_wei_main(total_needed, 18)} ETH (с учётом газа)."
+            )
+
+    # Состояние кошелька одним Multicall3 запросом
+    @timed("read_state")
+    async def read_state(self) -> WalletState:
+        try:
+            return await self.client.read_wallet_state()
+        except Exception as e:
+            raise SwapError(f"❌ Ошибка чтения состояния кошелька: {e}") from e
+
+    # Апрув для Odos
+    @timed("approve")
+    async def check_and_approve(self, allowance: Optional[int] = None) -> None:
+        try:
+            contract = await self.get_token_contract()
+
+            if allowance is None:
+                allowance = await contract.functions.allowance(
+                    self.client.address,
+                    self.client.router_address
+                ).call()
+
+            if allowance == 0:
+                print("⚠️ Нет апрува! Отправляем approve транзакцию...")
+
+                tx = await self.build_approve_tx(contract)
+                tx_hash = await self.send_stage("approve", tx)
+                print(f"🚀 Отправлена транзакция approve: {tx_hash.hex()}")
+                receipt = await self.client.wait_receipt(tx_hash)
+                self.record_stage("approve", "confirmed" if receipt.status == 1 else "failed")
+                print(f"✅ Approve подтвержден: {receipt.transactionHash.hex()}\n")
+            else:
+                print("✅ Approve уже есть, всё ок!\n")
+        except Exception as e:
+            raise SwapError(f"❌ Ошибка при approve: {e}") from e
+
+    # Врап нативного токена
+    @timed("wrap")
+    async def wrap_native(self, balance: Optional[int] = None) -> None:
+        try:
+            if balance is None:
+                balance = await self.client.w3.eth.get_balance(self.client.address)
+            gas_cost = await self.client.get_tx_fee()
+            await self.check_native_balance(balance, gas_cost)
+
+            tx = await self.build_wrap_tx()
+            tx_hash = await self.send_stage("wrap", tx)
+            print(f"🚀 Отправлена транзакция на врап: {tx_hash.hex()}\n")
+            receipt = await self.client.wait_receipt(tx_hash)
+            self.record_stage("wrap", "confirmed" if receipt.status == 1 else "failed")
+            print(f"✅ Транзакция на врап подтверждена: {receipt.transactionHash.hex()}\n")
+        except SwapError:
+            raise
+        except Exception as e:
+            raise SwapError(f"❌ Ошибка при врапе токена: {e}") from e
+
+    # Запрос к Odos API через общий пул соединений и очередь с лимитами
+    async def post_api(self, url: str, payload: Dict[str, Any], priority: int = PRIORITY_QUOTE) -> Dict[str, Any]:
+        proxy = self.proxy_pool.assign(self.client.address) if self.proxy_pool else self.client.proxy
+        try:
+            return await odos_scheduler.submit(priority, proxy, lambda: self._post(url, payload, proxy))
+        except asyncio.TimeoutError as e:
+            raise SwapError("⏱️ Превышено время ожидания ответа от Odos API.") from e
+        except aiohttp.ClientError as e:
+            raise SwapError(f"❌ Ошибка при обращении к Odos API: {e}") from e
+
+    # Параметры запроса котировки; по умолчанию вся сумма в основной выходной токен
+    def quote_params(self, amount_wei: Optional[int] = None, to_address: Optional[str] = None) -> Dict[str, Any]:
+        if amount_wei is None:
+            amount_wei = self.client.to_wei_main(self.client.amount, 18)
+        return {
+            "chainId": self.client.chain_id,
+            "inputTokens": [
+                {
+                    "tokenAddress": str(self.client.from_address),
+                    "amount": str(amount_wei),
+                }
+            ],
+            "outputTokens": [
+                {
+                    "tokenAddress": f"{to_address or self.client.to_address}",
+                    "proportion": 1
+                }
+            ],
+            "slippageLimitPercent": self.slippage,
+            "userAddr": self.client.address
+        }
+
+    # Один HTTP запрос с учётом здоровья прокси: HTTP-ошибки API прокси не штрафуют
+    async def _post(self, url: str, payload: Dict[str, Any], proxy: Optional[str]) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            response = await post_json(url, payload, proxy=proxy, timeout=15)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if self.proxy_pool:
+                self.proxy_pool.report(proxy, time.monotonic() - started, ok=False)
+            raise
+        if self.proxy_pool:
+            self.proxy_pool.report(proxy, time.monotonic() - started, ok=True)
+        return response
+
+    # Получение quote через Odos API
+    @timed("quote")
+    async def get_quote(self, amount_wei: Optional[int] = None, to_address: Optional[str] = None) -> Dict[str, Any]:
+        url = f"{self.api_url}/sor/quote/v2"
+        return await self.post_api(url, self.quote_params(amount_wei, to_address))
+
+    # Параллельные котировки для всех размеров частей и выходных токенов; выбор плана с лучшим
+    # выходом за вычетом газа. Решение стоит одного раунда котировок
+    @timed("plan_route")
+    async def plan_route(self, amount_wei: Optional[int] = None) -> RoutePlan:
+        if amount_wei is None:
+            amount_wei = self.client.to_wei_main(self.client.amount, 18)
+        route_candidates = candidates(amount_wei, self.route)
+        quotes = await asyncio.gather(
+            *(self.get_quote(candidate.amounts[0], candidate.to_address) for candidate in route_candidates),
+            return_exceptions=True,
+        )
+        plan = choose(route_candidates, quotes)
+        if plan is None:
+            errors = [quote for quote in quotes if isinstance(quote, Exception)]
+            if errors:
+                raise SwapError(f"❌ Не удалось подобрать маршрут: {errors[0]}")
+            raise SwapError("❌ Не удалось подобрать маршрут: в котировках нет оценки в USD")
+        print(f"🧭 Маршрут: {plan.parts} x {self.client.from_wei_main(plan.amounts[0], 18)} → {plan.to_address}, "
+              f"чистый выход ~${plan.net_value:.2f}")
+        return plan
+
+    # Первая котировка свапа: из плана маршрута, если поиск включён; по умолчанию на всю сумму
+    async def first_quote(self, amount_wei: Optional[int] = None) -> Tuple[Optional[RoutePlan], Dict[str, Any]]:
+        if self.route is None:
+            return None, await self.get_quote(amount_wei)
+        plan = await self.plan_route(amount_wei)
+        return plan, plan.quote
+
+    # Котировки для остальных частей плана, параллельно
+    async def remaining_quotes(self, plan: Optional[RoutePlan]) -> List[Dict[str, Any]]:
+        if plan is None:
+            return []
+        return list(await asyncio.gather(
+            *(self.get_quote(amount_wei, plan.to_address) for amount_wei in plan.amounts[1:])))
+
+    # Котировка для оценки и отчётов: из кэша, без гарантии свежего pathId
+    @timed("preview_quote")
+    async def preview_quote(self) -> Dict[str, Any]:
+        key = quote_cache.key(
+            self.client.chain_id, self.client.from_address, self.client.to_address,
+            self.client.to_wei_main(self.client.amount, 18))
+        return await quote_cache.get_or_fetch(key, self.get_quote)
+
+    # Проверка, стоит ли вообще свапать при текущем проскальзывании цены
+    async def check_price_impact(self) -> None:
+        if self.max_price_impact is None:
+            return
+        quote = await self.preview_quote()
+        price_impact = quote.get("priceImpact")
+        if price_impact is not None and abs(price_impact) > self.max_price_impact:
+            raise SwapError(
+                f"❌ Влияние на цену {abs(price_impact):.2f}% превышает допустимые {self.max_price_impact}%")
+
+    # Построение calldata через assemble
+    @timed("assemble")
+    async def assemble(self, quote: Dict[str, Any]) -> Dict[str, Any]:
+        if "pathId" not in quote:
+            raise SwapError(f"❌ Ошибка сборки транзакции: в котировке нет pathId ({quote})")
+
+        assemble_url = f"{self.api_url}/sor/assemble"
+        assemble_request_body = {
+            "pathId": quote["pathId"],
+            "userAddr": str(self.client.address)
+        }
+
+        return await self.post_api(assemble_url, assemble_request_body, PRIORITY_ASSEMBLE)
+
+    # Отправка транзакции на свап
+    @timed("swap")
+    async def swap(self, build_data: Dict[str, Any], balance: Optional[int] = None,
+                   amount_wei: Optional[int] = None, stage: str = "swap") -> Optional[str]:
+        try:
+            amount = amount_wei if amount_wei is not None else self.client.to_wei_main(self.client.amount, 18)
+
+            if balance is None:
+                balance = await self.client.get_erc20_balance()
+            if balance < amount:
+                raise InsufficientFundsError(
+                    f"❌ Недостаточно токенов для свапа. Баланс: {self.client.from_wei_main(balance, 18)}, "
+                    f"требуется: {self.client.from_wei_main(amount, 18)}."
+                )
+            # Газ платится нативным токеном, а не свапаемым
+            native_balance, gas_cost = await asyncio.gather(
+                self.client.w3.eth.get_balance(self.client.address), self.client.get_tx_fee())
+            if native_balance < gas_cost:
+                raise InsufficientFundsError(
+                    f"❌ Недостаточно нативного токена на газ. Баланс: "
+                    f"{self.client.from_wei_main(native_balance, 18)} ETH, "
+                    f"требуется: {self.client.from_wei_main(gas_cost, 18)} ETH."
+                )
+
+            if self.preflight_enabled:
+                await self.preflight_swap(build_data)
+            tx = await self.build_swap_tx(build_data)
+            tx_hash = await self.send_stage(stage, tx, amount)
+            print("✅ Транзакция успешно отправлена!\n")
+            return tx_hash.hex()
+        except SwapError:
+            raise
+        except Exception as e:
+            raise SwapError(f"❌ Ошибка при отправке транзакции: {e}") from e
+
+    # Функция сборки для выполнения всех модулей
+    @timed("execute")
+    async def execute(self, state: Optional[WalletState] = None) -> bool:
+        await self.resume_pending()
+        if self.is_done("swap"):
+            print("✅ Свап уже выполнен по журналу, пропускаем кошелёк\n")
+            return True
+
+        await self.check_price_impact()
+        if state is None or self.resumed:
+            state = await self.read_state()
+        if self.preflight_enabled:
+            await self.preflight(state)
+        if not self.is_done("approve"):
+            await self.check_and_approve(state.allowance)
+        if not self.is_done("wrap"):
+            await self.wrap_native(state.native_balance)
+            wrapped_balance = state.token_balance + self.client.to_wei_main(self.client.amount, 18)
+        else:
+            wrapped_balance = state.token_balance
+        await asyncio.sleep(0.5)
+        # После перезапуска подтверждённые части не повторяются: план строится на остаток суммы
+        offset, swapped = self.journal.swap_parts() if self.journal is not None else (0, 0)
+        remaining = self.client.to_wei_main(self.client.amount, 18) - swapped
+        if swapped:
+            print(f"🔁 По журналу уже обменяно {self.client.from_wei_main(swapped, 18)}, "
+                  f"продолжаем с остатка {self.client.from_wei_main(remaining, 18)}")
+        plan, quote = await self.first_quote(remaining if swapped else None)
+        amounts = plan.amounts if plan is not None else [remaining if swapped else None]
+        for part, amount_wei in enumerate(amounts):
+            if part > 0:
+                quote = await self.get_quote(amount_wei, plan.to_address)
+            # В журнале основной этап — последняя часть; промежуточные пишутся как swap_part_N со своей суммой,
+            # номера продолжаются после частей прошлых запусков
+            stage = "swap" if part == len(amounts) - 1 else f"{SWAP_PART_PREFIX}{offset + part}"
+            await asyncio.sleep(0.5)
+            build_data = await self.assemble(quote)
+            await asyncio.sleep(0.5)
+            tx_hash = await self.swap(build_data, wrapped_balance, amount_wei, stage)
+            if not tx_hash:
+                return False
+            print(f"🔁 Ожидание подтверждения транзакции: {tx_hash}\n")
+            await asyncio.sleep(0.5)
+            success = await self.client.wait_tx(tx_hash, self.client.explorer_url)
+            # Без подтверждения статус остаётся "sent" и будет перепроверен при следующем запуске
+            if not success:
+                return False
+            self.record_stage(stage, "confirmed")
+            self.record_swap(quote)
+            if amount_wei is not None:
+                wrapped_balance -= amount_wei
+        return True
+
+    # Конвейерный режим: approve, врап и свап уходят подряд с последовательными nonce
+    @timed("execute_pipelined")
+    async def execute_pipelined(self, state: Optional[WalletState] = None) -> bool:
+        # Продолжение после перезапуска идёт по шагам
+        if self.resumed:
+            return await self.execute(state)
+        await self.check_price_impact()
+        try:
+            contract = await self.get_token_contract()
+            if state is None:
+                state, gas_cost, (plan, quote) = await asyncio.gather(
+                    self.read_state(), self.client.get_tx_fee(), self.first_quote())
+            else:
+                gas_cost, (plan, quote) = await asyncio.gather(self.client.get_tx_fee(), self.first_quote())
+            if self.preflight_enabled:
+                await self.preflight(state)
+            else:
+                await self.check_native_balance(state.native_balance, gas_cost)
+            quotes = [quote] + await self.remaining_quotes(plan)
+            swaps = await asyncio.gather(*(self.assemble(part_quote) for part_quote in quotes))
+            if self.preflight_enabled:
+                await self.preflight_swap(swaps[0], state)
+
+            # Части свапа: swap_part_0, swap_part_1, ..., последняя — swap
+            swap_stages = [f"{SWAP_PART_PREFIX}{part}" for part in range(len(swaps) - 1)] + ["swap"]
+            stages: List[Tuple[str, TxParams]] = []
+            if state.allowance == 0:
+                stages.append(("approve", await self.build_approve_tx(contract)))
+            stages.append(("wrap", await self.build_wrap_tx()))
+            for stage, build_data in zip(swap_stages, swaps):
+                stages.append((stage, await self.build_swap_tx(build_data)))
+            # Суммы частей в журнале нужны, чтобы после перезапуска продолжить с остатка
+            amounts = dict(zip(swap_stages[:-1], plan.amounts)) if plan is not None else {}
+
+            sent: List[Tuple[str, TxParams, HexBytes]] = []
+            for stage, tx in stages:
+                tx_hash = await self.send_stage(stage, tx, amounts.get(stage))
+                print(f"🚀 Отправлена транзакция {stage} (nonce {tx['nonce']}): {tx_hash.hex()}")
+                sent.append((stage, tx, tx_hash))
+        except SwapError:
+            raise
+        except Exception as e:
+            raise SwapError(f"❌ Ошибка при конвейерной отправке: {e}") from e
+
+        return await self.wait_pipeline(sent, dict(zip(swap_stages, quotes)))
+
+    # Ожидание квитанций в порядке nonce; после первой неудачи остальные отменяются.
+    # Суммы частей свапа учитываются по котировкам только после подтверждения
+    @timed("wait_pipeline")
+    async def wait_pipeline(self, sent: List[Tuple[str, TxParams, HexBytes]],
+                            swap_quotes: Optional[Dict[str, Dict[str, Any]]] = None) -> bool:
+        for index, (stage, tx, tx_hash) in enumerate(sent):
+            try:
+                receipt = await self.client.wait_receipt(tx_hash, timeout=120)
+            except Exception as e:
+                print(f"❌ Транзакция {stage} не подтверждена: {e}")
+                await self.cancel_pending(sent[index + 1:])
+                return False
+
+            if receipt.status != 1:
+                print(f"❌ Транзакция {stage} отклонена: {tx_hash.hex()}")
+                self.record_stage(stage, "failed")
+                await self.cancel_pending(sent[index + 1:])
+                return False
+            self.record_stage(stage, "confirmed")
+            if swap_quotes and stage in swap_quotes:
+                self.record_swap(swap_quotes[stage])
+            print(f"✅ Транзакция {stage} подтверждена: {tx_hash.hex()}")
+
+        swap_hash = sent[-1][2].hex()
+        print(f"🎯 Свап выполнен: {self.client.explorer_url}tx/{swap_hash}\n")
+        return True
+
+    # Замена ещё не включённых транзакций пустым переводом самому себе с тем же nonce
+    @timed("cancel")
+    async def cancel_pending(self, sent: List[Tuple[str, TxParams, HexBytes]]) -> None:
+        for stage, tx, tx_hash in sent:
+            try:
+                await self.client.w3.eth.get_transaction_receipt(tx_hash)
+                continue
+            except TransactionNotFound:
+                pass
+
+            try:
+                gas_price = max(tx["gasPrice"], await self.client.get_gas_price())
+                cancel_tx: TxParams = {
+                    "from": self.client.address,
+                    "to": self.client.address,
+                    "value": 0,
+                    "nonce": tx["nonce"],
+                    "gas": 21000,
+                    "gasPrice": int(gas_price * 1.2),
+                    "chainId": tx["chainId"],
+                }
+                signed_cancel = await self.client.sign(cancel_tx)
+                # Этап остаётся "sent": какая из двух транзакций попала в блок, решит следующий запуск
+                if self.journal is not None:
+                    await self.journal.record_cancel(stage, self.client.w3.keccak(signed_cancel).hex())
+                cancel_hash = await self.client.w3.eth.send_raw_transaction(signed_cancel)
+                print(f"🛑 Транзакция {stage} заменена отменой: {cancel_hash.hex()}")
+            except Exception as e:
+                print(f"⚠️ Не удалось отменить транзакцию {stage}: {e}")
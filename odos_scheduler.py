@@ -0,0 +1,154 @@
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from metrics import metrics
+import itertools
+import aiohttp
+import asyncio
+import random
+import heapq
+import time
+
+T = TypeVar("T")
+
+# assemble обслуживается раньше котировок, чтобы pathId не протух в очереди
+PRIORITY_ASSEMBLE = 0
+PRIORITY_QUOTE = 1
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    # Сколько ждать до появления токена (0 — токен есть)
+    def wait_time(self) -> float:
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+
+class OdosScheduler:
+    """Очередь запросов к Odos API с лимитами в секунду (общим и на прокси) и повторами с backoff"""
+
+    def __init__(self, global_rps: float = 10, proxy_rps: float = 3, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30) -> None:
+        self.configure(global_rps, proxy_rps, max_retries, base_delay, max_delay)
+        self._queue: List[Tuple[int, int, Optional[str], float, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.max_depth = 0
+        self.dispatched = 0
+        self.total_wait = 0.0
+        self.retries = 0
+
+    def configure(self, global_rps: float, proxy_rps: float, max_retries: int = 5,
+                  base_delay: float = 0.5, max_delay: float = 30) -> None:
+        self.global_bucket = TokenBucket(global_rps)
+        self.proxy_rps = proxy_rps
+        self.proxy_buckets: Dict[Optional[str], TokenBucket] = {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def _proxy_bucket(self, proxy: Optional[str]) -> TokenBucket:
+        if proxy not in self.proxy_buckets:
+            self.proxy_buckets[proxy] = TokenBucket(self.proxy_rps)
+        return self.proxy_buckets[proxy]
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    # Ожидание своей очереди с учётом приоритета и лимитов
+    async def _acquire(self, priority: int, proxy: Optional[str]) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._order), proxy, time.monotonic(), future))
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._wakeup.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self) -> None:
+        while self._queue:
+            self._wakeup.clear()
+            sleep_for = None
+            for entry in sorted(self._queue):
+                priority, _, proxy, queued_at, future = entry
+                if future.done():
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    continue
+                wait = max(self.global_bucket.wait_time(), self._proxy_bucket(proxy).wait_time())
+                if wait == 0:
+                    self.global_bucket.take()
+                    self._proxy_bucket(proxy).take()
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self.dispatched += 1
+                    self.total_wait += time.monotonic() - queued_at
+                    future.set_result(None)
+                    sleep_for = 0
+                    break
+                sleep_for = wait if sleep_for is None else min(sleep_for, wait)
+
+            if sleep_for:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), sleep_for)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(0)
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        headers = getattr(error, "headers", None) or {}
+        retry_after = headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+        return min(self.max_delay, self.base_delay * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, aiohttp.ClientResponseError):
+            return error.status in RETRY_STATUSES
+        return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+    # Выполнение запроса через очередь; повтор при 429/5xx и сетевых ошибках
+    async def submit(self, priority: int, proxy: Optional[str], call: Callable[[], Awaitable[T]]) -> T:
+        attempt = 0
+        while True:
+            await self._acquire(priority, proxy)
+            try:
+                return await call()
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    raise
+                delay = self._retry_delay(attempt, e)
+                attempt += 1
+                self.retries += 1
+                metrics.count("http_retries", "odos")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> str:
+        average_wait = self.total_wait / self.dispatched if self.dispatched else 0.0
+        return (f"🚦 Odos API: в очереди {self.depth} (макс. {self.max_depth}), "
+                f"среднее ожидание {average_wait:.2f}с, повторов {self.retries}")
+
+
+odos_scheduler = OdosScheduler()
@@ -0,0 +1,102 @@
+from http_session import get_status
+from typing import Dict, List, Optional
+import aiohttp
+import asyncio
+import time
+
+HEALTH_CHECK_URL = "https://httpbin.org/ip"
+HEALTH_CHECK_TIMEOUT = 5
+# Прокси с таким числом ошибок подряд исключается из пула
+MAX_CONSECUTIVE_FAILURES = 3
+
+
+class ProxyState:
+    def __init__(self, proxy: str) -> None:
+        self.proxy = proxy
+        self.ewma_latency: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.ejected = False
+        self.assigned = 0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    # Чем меньше, тем лучше
+    def score(self) -> float:
+        latency = self.ewma_latency if self.ewma_latency is not None else 1.0
+        return latency * (1 + 10 * self.error_rate)
+
+
+class ProxyPool:
+    """Пул прокси: проверка при старте, оценка по задержке и ошибкам, закрепление кошельков за прокси"""
+
+    def __init__(self, proxies: List[str]) -> None:
+        self.states: Dict[str, ProxyState] = {proxy: ProxyState(proxy) for proxy in proxies}
+        self.assignments: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "ProxyPool":
+        with open(path, "r", encoding="utf-8") as file:
+            return cls([line.strip() for line in file if line.strip()])
+
+    def healthy(self) -> List[ProxyState]:
+        return [state for state in self.states.values() if not state.ejected]
+
+    # Параллельная проверка всех прокси
+    async def check_all(self) -> int:
+        await asyncio.gather(*(self._check(state) for state in self.states.values()))
+        return len(self.healthy())
+
+    async def _check(self, state: ProxyState) -> None:
+        started = time.monotonic()
+        try:
+            status = await get_status(HEALTH_CHECK_URL, proxy=state.proxy, timeout=HEALTH_CHECK_TIMEOUT)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            status = None
+        if status == 200:
+            self.report(state.proxy, time.monotonic() - started, ok=True)
+        else:
+            state.ejected = True
+
+    def _pick(self) -> ProxyState:
+        candidates = self.healthy() or list(self.states.values())
+        return min(candidates, key=lambda state: (state.assigned + 1) * state.score())
+
+    # Прокси для кошелька; закрепление сохраняется, пока прокси жив. Пустой пул — прямое соединение
+    def assign(self, key: str) -> Optional[str]:
+        if not self.states:
+            return None
+        proxy = self.assignments.get(key)
+        if proxy is not None and not self.states[proxy].ejected:
+            return proxy
+        if proxy is not None:
+            self.states[proxy].assigned -= 1
+
+        state = self._pick()
+        state.assigned += 1
+        self.assignments[key] = state.proxy
+        return state.proxy
+
+    # Лучший прокси для общих запросов
+    def best(self) -> Optional[str]:
+        return self._pick().proxy if self.states else None
+
+    def report(self, proxy: Optional[str], latency: float, ok: bool) -> None:
+        state = self.states.get(proxy)
+        if state is None:
+            return
+        state.requests += 1
+        if ok:
+            state.consecutive_failures = 0
+            state.ewma_latency = latency if state.ewma_latency is None else 0.8 * state.ewma_latency + 0.2 * latency
+        else:
+            state.errors += 1
+            state.consecutive_failures += 1
+            if state.consecutive_failures >= MAX_CONSECUTIVE_FAILURES and len(self.healthy()) > 1:
+                state.ejected = True
+
+    def stats(self) -> str:
+        return f"🌐 Прокси: рабочих {len(self.healthy())}/{len(self.states)}"
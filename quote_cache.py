@@ -0,0 +1,64 @@
+from typing import Any, Awaitable, Callable, Dict, Tuple
+import asyncio
+import math
+import time
+
+QUOTE_TTL = 10.0
+# Ширина корзины суммы: суммы в пределах ~1% друг от друга делят одну котировку
+BUCKET_STEP = 0.01
+
+QuoteKey = Tuple[int, str, str, int]
+
+
+class QuoteCache:
+    """Кэш котировок для предварительных проверок; для assemble всегда нужна свежая котировка"""
+
+    def __init__(self, ttl: float = QUOTE_TTL, bucket_step: float = BUCKET_STEP) -> None:
+        self.ttl = ttl
+        self.bucket_step = bucket_step
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: Dict[QuoteKey, Tuple[float, Dict[str, Any]]] = {}
+        self._in_flight: Dict[QuoteKey, asyncio.Future] = {}
+
+    def key(self, chain_id: int, token_in: str, token_out: str, amount_wei: int) -> QuoteKey:
+        bucket = round(math.log(amount_wei) / math.log1p(self.bucket_step)) if amount_wei > 0 else 0
+        return chain_id, token_in.lower(), token_out.lower(), bucket
+
+    # Котировка из кэша; одинаковые одновременные запросы ждут один вызов fetch
+    async def get_or_fetch(self, key: QuoteKey, fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            self.hits += 1
+            return entry[1]
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(in_flight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            quote = await fetch()
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже передано ожидающим, само future больше никому не нужно
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+        self._entries[key] = (time.monotonic(), quote)
+        future.set_result(quote)
+        return quote
+
+    def stats(self) -> str:
+        return f"💾 Кэш котировок: попаданий {self.hits}, промахов {self.misses}, объединено {self.coalesced}"
+
+
+quote_cache = QuoteCache()
@@ -0,0 +1,123 @@
+from typing import Dict, Iterable, Optional, Set, Union
+from fee_oracle import get_fee_oracle
+from web3.types import TxReceipt
+from hexbytes import HexBytes
+from web3 import AsyncWeb3
+import asyncio
+import time
+
+MIN_POLL_INTERVAL = 0.25
+MAX_POLL_INTERVAL = 10.0
+# При большем отставании проверяем квитанции напрямую, а не каждый блок
+MAX_BLOCK_GAP = 20
+
+
+class ReceiptTracker:
+    """Один цикл опроса новых блоков на сеть вместо поллинга каждой транзакции"""
+
+    def __init__(self, w3: AsyncWeb3, chain_id: int) -> None:
+        self.w3 = w3
+        self.chain_id = chain_id
+        self.block_time = 2.0
+        self.last_block: Optional[int] = None
+        self._last_block_at = 0.0
+        self._pending: Dict[HexBytes, asyncio.Future] = {}
+        # Транзакции, замеченные в блоках, но без квитанции: узел отстал или запрос упал; проверяются при каждом опросе
+        self._recheck: Set[HexBytes] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def poll_interval(self) -> float:
+        return min(max(self.block_time / 2, MIN_POLL_INTERVAL), MAX_POLL_INTERVAL)
+
+    # Ожидание квитанции транзакции
+    async def wait(self, tx_hash: Union[str, HexBytes], timeout: float = 120) -> TxReceipt:
+        tx_hash = HexBytes(tx_hash)
+        future = self._pending.get(tx_hash)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[tx_hash] = future
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._run())
+            # Транзакция могла попасть в блок до начала отслеживания
+            await self._check_directly([tx_hash])
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.CancelledError:
+            # Ожидание снято (например, в блок попала другая транзакция с тем же nonce): хэш больше не отслеживается
+            if not future.done():
+                self._pending.pop(tx_hash, None)
+            raise
+        except asyncio.TimeoutError:
+            await self._check_directly([tx_hash])
+            if future.done():
+                return future.result()
+            self._pending.pop(tx_hash, None)
+            raise
+
+    def _resolve(self, tx_hash: HexBytes, receipt: TxReceipt) -> None:
+        future = self._pending.pop(tx_hash, None)
+        if future is not None and not future.done():
+            future.set_result(receipt)
+
+    async def _check_directly(self, tx_hashes: list) -> None:
+        receipts = await asyncio.gather(
+            *(self.w3.eth.get_transaction_receipt(tx_hash) for tx_hash in tx_hashes), return_exceptions=True)
+        for tx_hash, receipt in zip(tx_hashes, receipts):
+            if not isinstance(receipt, Exception):
+                self._resolve(tx_hash, receipt)
+
+    # Квитанции транзакций из новых блоков вместе с ранее не полученными
+    async def _check_included(self, tx_hashes: Iterable[HexBytes]) -> None:
+        candidates = [tx_hash for tx_hash in self._recheck.union(tx_hashes) if tx_hash in self._pending]
+        if candidates:
+            await self._check_directly(candidates)
+        self._recheck = {tx_hash for tx_hash in candidates if tx_hash in self._pending}
+
+    # Опрос eth_blockNumber с интервалом от времени блока
+    async def _run(self) -> None:
+        while self._pending:
+            try:
+                block_number = await self.w3.eth.block_number
+                if self.last_block is None:
+                    self.last_block = block_number - 1
+                    self._last_block_at = time.monotonic()
+                if block_number > self.last_block:
+                    await self._on_new_blocks(block_number)
+                elif self._recheck:
+                    await self._check_included([])
+            except Exception:
+                pass
+            await asyncio.sleep(self.poll_interval)
+
+    async def _on_new_blocks(self, block_number: int) -> None:
+        now = time.monotonic()
+        gap = block_number - self.last_block
+        observed = (now - self._last_block_at) / gap
+        self.block_time = 0.8 * self.block_time + 0.2 * observed
+        get_fee_oracle(self.chain_id, self.w3).on_new_block(block_number)
+
+        if gap > MAX_BLOCK_GAP:
+            await self._check_directly(list(self._pending))
+        else:
+            blocks = await asyncio.gather(
+                *(self.w3.eth.get_block(number) for number in range(self.last_block + 1, block_number + 1)))
+            included = [HexBytes(tx_hash) for block in blocks for tx_hash in block["transactions"]
+                        if HexBytes(tx_hash) in self._pending]
+            await self._check_included(included)
+        self._recheck.intersection_update(self._pending)
+
+        self.last_block = block_number
+        self._last_block_at = now
+
+
+# Один трекер на сеть; подключение обновляется при смене прокси общих сервисов
+_trackers: Dict[int, ReceiptTracker] = {}
+
+
+def get_receipt_tracker(chain_id: int, w3: AsyncWeb3) -> ReceiptTracker:
+    if chain_id not in _trackers:
+        _trackers[chain_id] = ReceiptTracker(w3, chain_id)
+    _trackers[chain_id].w3 = w3
+    return _trackers[chain_id]
@@ -0,0 +1,73 @@
+from typing import Any, Dict, List, Optional
+from termcolor import cprint
+import asyncio
+import json
+
+RESULTS_FILE = "results.jsonl"
+
+# Итоги не нужны для продолжения после падения, поэтому пишутся пачками без fsync
+FLUSH_INTERVAL = 0.5
+FLUSH_SIZE = 500
+
+
+class ResultsWriter:
+    """Итог каждого кошелька строкой JSONL: статус, хэши, газ, суммы, длительности этапов и класс ошибки"""
+
+    def __init__(self, path: str, flush_interval: float = FLUSH_INTERVAL, flush_size: int = FLUSH_SIZE) -> None:
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.written = 0
+        self._buffer: List[str] = []
+        self._file = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._closing = False
+
+    async def start(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._wakeup = asyncio.Event()
+        self._flusher = asyncio.create_task(self._run())
+
+    # Запись не ждёт диска: строка уходит в буфер, полный буфер будит фоновую задачу
+    def write(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(json.dumps(record, ensure_ascii=False) + "\n")
+        if len(self._buffer) >= self.flush_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except OSError as e:
+                cprint(f"⚠️ Не удалось записать результаты: {e}", "light_red")
+            if self._closing:
+                return
+
+    # Запись накопленных строк в отдельном потоке
+    async def flush(self) -> None:
+        if not self._buffer or self._file is None:
+            return
+        lines, self._buffer = self._buffer, []
+        await asyncio.get_running_loop().run_in_executor(None, self._write, lines)
+        self.written += len(lines)
+
+    def _write(self, lines: List[str]) -> None:
+        self._file.writelines(lines)
+        self._file.flush()
+
+    # Дописать буфер и закрыть файл
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._closing = True
+            self._wakeup.set()
+            await self._flusher
+            self._flusher = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
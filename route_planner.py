@@ -0,0 +1,70 @@
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+
+class RouteSearch(NamedTuple):
+    # На сколько частей пробовать делить сумму, например (1, 2, 4)
+    splits: Sequence[int]
+    # Выходные токены-кандидаты; первый — основной из networks_data.json
+    to_addresses: Sequence[str]
+
+
+class RouteCandidate(NamedTuple):
+    to_address: str
+    amounts: List[int]
+
+    @property
+    def parts(self) -> int:
+        return len(self.amounts)
+
+
+class RoutePlan(NamedTuple):
+    to_address: str
+    amounts: List[int]
+    net_value: float
+    quote: Dict[str, Any]
+
+    @property
+    def parts(self) -> int:
+        return len(self.amounts)
+
+
+# Сумма в wei, разбитая на parts частей; остаток от деления уходит в последнюю
+def split_amount(amount_wei: int, parts: int) -> List[int]:
+    part = amount_wei // parts
+    return [part] * (parts - 1) + [amount_wei - part * (parts - 1)]
+
+
+def candidates(amount_wei: int, search: RouteSearch) -> List[RouteCandidate]:
+    return [
+        RouteCandidate(to_address, split_amount(amount_wei, parts))
+        for to_address in search.to_addresses
+        for parts in sorted(set(search.splits))
+        if parts >= 1 and amount_wei // parts > 0
+    ]
+
+
+# Чистая стоимость плана в USD: выход за вычетом газа, умноженный на число частей.
+# Котировка первой части считается представительной для остальных
+def net_value(quote: Dict[str, Any], parts: int) -> Optional[float]:
+    net = quote.get("netOutValue")
+    if net is None:
+        out_values = quote.get("outValues")
+        gas_value = quote.get("gasEstimateValue")
+        if not out_values or gas_value is None:
+            return None
+        net = sum(float(value) for value in out_values) - float(gas_value)
+    return float(net) * parts
+
+
+# Лучший план среди котировок; кандидаты с ошибкой или без оценки в USD пропускаются
+def choose(route_candidates: Sequence[RouteCandidate], quotes: Sequence[Any]) -> Optional[RoutePlan]:
+    best: Optional[RoutePlan] = None
+    for candidate, quote in zip(route_candidates, quotes):
+        if isinstance(quote, BaseException) or not isinstance(quote, dict):
+            continue
+        value = net_value(quote, candidate.parts)
+        if value is None:
+            continue
+        if best is None or value > best.net_value:
+            best = RoutePlan(candidate.to_address, candidate.amounts, value, quote)
+    return best
@@ -0,0 +1,85 @@
+from web3._utils.encoding import Web3JsonEncoder
+from web3.types import RPCEndpoint, RPCResponse
+from typing import Any, Dict, List, Optional, Tuple
+from web3 import AsyncHTTPProvider
+from proxy_pool import ProxyPool
+from rpc_pool import RpcPool
+from metrics import metrics
+import itertools
+import asyncio
+import json
+
+# Окно накопления запросов и максимальный размер пачки
+BATCH_WINDOW = 0.005
+MAX_BATCH_SIZE = 50
+# Методы, которые не батчатся, а рассылаются на несколько узлов сразу
+BROADCAST_METHODS = {"eth_sendRawTransaction"}
+
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, cls=Web3JsonEncoder)
+
+
+class BatchingHTTPProvider(AsyncHTTPProvider):
+    """Провайдер, объединяющий одновременные JSON-RPC вызовы в один batch-запрос к пулу узлов"""
+
+    def __init__(self, endpoint_uris: List[str], proxy: Optional[str] = None, batch_window: float = BATCH_WINDOW,
+                 max_batch_size: int = MAX_BATCH_SIZE, proxy_pool: Optional[ProxyPool] = None) -> None:
+        super().__init__(endpoint_uris[0])
+        self.proxy = proxy
+        self.pool = RpcPool(endpoint_uris, proxy, _dumps, proxy_pool)
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._ids = itertools.count()
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        request = {"jsonrpc": "2.0", "method": method, "params": params, "id": next(self._ids)}
+        metrics.count("rpc_calls", method)
+        if method in BROADCAST_METHODS:
+            return await self.pool.broadcast(request)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._schedule_flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.batch_window, self._schedule_flush)
+        return await future
+
+    def _schedule_flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        if pending:
+            asyncio.ensure_future(self._send(pending))
+
+    # Отправка пачки и раздача ответов ожидающим корутинам
+    async def _send(self, pending: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        try:
+            metrics.count("rpc_batches")
+            if len(pending) == 1:
+                responses = [await self.pool.request(pending[0][0])]
+            else:
+                responses = await self.pool.request([request for request, _ in pending])
+            if not isinstance(responses, list):
+                raise ValueError(f"RPC вернул не batch-ответ: {responses}")
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        by_id = {response.get("id"): response for response in responses}
+        for request, future in pending:
+            if future.done():
+                continue
+            response = by_id.get(request["id"])
+            if response is None:
+                future.set_exception(ValueError(f"Нет ответа на {request['method']} в batch-ответе"))
+            else:
+                future.set_result(response)
@@ -0,0 +1,167 @@
+from typing import Any, Callable, Deque, List, Optional
+from http_session import post_json
+from proxy_pool import ProxyPool
+from urllib.parse import urlsplit
+from collections import deque
+from metrics import metrics
+import aiohttp
+import asyncio
+import time
+
+REQUEST_TIMEOUT = 30
+# Задержка перед дублирующим запросом — перцентиль задержек лучшего узла
+HEDGE_PERCENTILE = 90
+MIN_HEDGE_DELAY = 0.05
+DEFAULT_HEDGE_DELAY = 0.5
+# Узел с несколькими ошибками подряд временно исключается
+MAX_CONSECUTIVE_FAILURES = 3
+EJECT_SECONDS = 30
+BROADCAST_COUNT = 3
+
+
+# Метка узла для метрик: хост и порт без пути и параметров, где у провайдеров обычно лежит ключ API
+def endpoint_label(url: str) -> str:
+    parts = urlsplit(url)
+    if not parts.hostname:
+        return url
+    return f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname
+
+
+class Endpoint:
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.label = endpoint_label(url)
+        self.latencies: Deque[float] = deque(maxlen=100)
+        self.ewma_latency: Optional[float] = None
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.requests if self.requests else 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    # Чем меньше, тем лучше: задержка со штрафом за долю ошибок
+    def score(self) -> float:
+        latency = self.ewma_latency if self.ewma_latency is not None else DEFAULT_HEDGE_DELAY
+        return latency * (1 + 10 * self.error_rate)
+
+    def hedge_delay(self) -> float:
+        if len(self.latencies) < 10:
+            return DEFAULT_HEDGE_DELAY
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * HEDGE_PERCENTILE / 100))
+        return max(ordered[index], MIN_HEDGE_DELAY)
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.requests += 1
+        if ok:
+            self.latencies.append(latency)
+            self.ewma_latency = latency if self.ewma_latency is None else 0.8 * self.ewma_latency + 0.2 * latency
+            self.consecutive_failures = 0
+        else:
+            self.errors += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= MAX_CONSECUTIVE_FAILURES:
+                self.ejected_until = time.monotonic() + EJECT_SECONDS
+                self.consecutive_failures = 0
+
+
+class RpcPool:
+    """Набор RPC узлов сети: чтение с самого быстрого, хеджирование медленных запросов, рассылка транзакций"""
+
+    def __init__(self, urls: List[str], proxy: Optional[str] = None,
+                 dumps: Optional[Callable[[Any], str]] = None, proxy_pool: Optional[ProxyPool] = None) -> None:
+        if not urls:
+            raise ValueError("RpcPool: список RPC узлов пуст")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.proxy = proxy
+        self.dumps = dumps
+        self.proxy_pool = proxy_pool
+
+    # Узлы по возрастанию score; исключённые — в конце
+    def ranked(self) -> List[Endpoint]:
+        return sorted(self.endpoints, key=lambda endpoint: (not endpoint.healthy, endpoint.score()))
+
+    # Один HTTP запрос; ошибки соединения и таймауты идут и в статистику прокси, HTTP-ошибки узла прокси не штрафуют
+    async def _post(self, endpoint: Endpoint, payload: Any) -> Any:
+        started = time.monotonic()
+        metrics.count("rpc_http_requests", endpoint.label)
+        try:
+            kwargs = {"dumps": self.dumps} if self.dumps else {}
+            response = await post_json(endpoint.url, payload, self.proxy, REQUEST_TIMEOUT, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            metrics.count("rpc_http_errors", endpoint.label)
+            endpoint.record(time.monotonic() - started, ok=False)
+            if self.proxy_pool and isinstance(e, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+                self.proxy_pool.report(self.proxy, time.monotonic() - started, ok=False)
+            raise
+        endpoint.record(time.monotonic() - started, ok=True)
+        if self.proxy_pool:
+            self.proxy_pool.report(self.proxy, time.monotonic() - started, ok=True)
+        return response
+
+    # Чтение: запрос к лучшему узлу, дубль на следующий после задержки, переход дальше при ошибке
+    async def request(self, payload: Any) -> Any:
+        endpoints = self.ranked()
+        primary, backups = endpoints[0], endpoints[1:]
+        tasks = {asyncio.ensure_future(self._post(primary, payload))}
+        hedge_delay: Optional[float] = primary.hedge_delay() if backups else None
+        last_error: Optional[BaseException] = None
+
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Дубль только один; если резервные узлы уже ушли на переход после ошибки, просто ждём
+                    if backups:
+                        metrics.count("rpc_hedges")
+                        tasks.add(asyncio.ensure_future(self._post(backups.pop(0), payload)))
+                    hedge_delay = None
+                    continue
+
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                if not tasks and backups:
+                    metrics.count("rpc_failovers")
+                    tasks.add(asyncio.ensure_future(self._post(backups.pop(0), payload)))
+                    if not backups:
+                        hedge_delay = None
+            raise last_error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # Отправка транзакции сразу на несколько узлов; первый успешный ответ возвращается, остальные досылаются
+    async def broadcast(self, payload: Any) -> Any:
+        targets = [endpoint for endpoint in self.ranked() if endpoint.healthy][:BROADCAST_COUNT]
+        if not targets:
+            targets = self.ranked()[:BROADCAST_COUNT]
+        tasks = [asyncio.ensure_future(self._post(endpoint, payload)) for endpoint in targets]
+        # Ошибки досылки на остальные узлы после первого успешного ответа не важны
+        for task in tasks:
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+        first_response = None
+        last_error: Optional[BaseException] = None
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                response = await next_done
+            except Exception as e:
+                last_error = e
+                continue
+            if "error" not in response:
+                return response
+            first_response = first_response or response
+        if first_response is not None:
+            return first_response
+        raise last_error
@@ -0,0 +1,60 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Optional
+from wallet_store import WalletStore
+from eth_account.signers.local import LocalAccount
+from eth_account import Account
+import multiprocessing
+import asyncio
+
+# Ключи воркера по адресу загружаются один раз в initializer; аккаунт создаётся при первой подписи
+_keys: Dict[str, str] = {}
+_accounts: Dict[str, LocalAccount] = {}
+
+
+def _init_worker(keys: Dict[str, str]) -> None:
+    _keys.update(keys)
+
+
+def _ready() -> int:
+    return len(_keys)
+
+
+def _sign(address: str, transaction: Dict[str, Any]) -> bytes:
+    account = _accounts.get(address)
+    if account is None:
+        account = _accounts[address] = Account.from_key(_keys[address])
+    return bytes(account.sign_transaction(transaction).rawTransaction)
+
+
+class ProcessSigner:
+    """Подпись транзакций в пуле процессов, чтобы secp256k1 не блокировал цикл событий.
+
+    Ключи передаются воркерам один раз при старте; в каждый вызов уходят только адрес и неподписанная транзакция.
+    """
+
+    def __init__(self, store: WalletStore, processes: int) -> None:
+        self.addresses = set(store.addresses)
+        self.processes = processes
+        self._executor: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(dict(zip(store.addresses, store.private_keys)),),
+        )
+
+    def can_sign(self, address: str) -> bool:
+        return self._executor is not None and address in self.addresses
+
+    # Запуск всех воркеров заранее, чтобы загрузка ключей не попала на первые подписи
+    async def warm_up(self) -> None:
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self._executor, _ready)
+                               for _ in range(self.processes)))
+
+    async def sign(self, address: str, transaction: Dict[str, Any]) -> bytes:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, _sign, address, dict(transaction))
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,56 @@
+from journal import Journal
+import asyncio
+
+NETWORK = "arbitrum"
+ADDRESS = "0x" + "11" * 20
+
+
+# Прогон, упавший после первой подтверждённой части свапа из трёх
+async def write_interrupted_run(path: str) -> None:
+    journal = Journal(path)
+    await journal.start()
+    wallet = journal.wallet(NETWORK, ADDRESS)
+    await wallet.record_sent("swap_part_0", "0xaa", 400)
+    wallet.record("swap_part_0", "confirmed")
+    await wallet.record_sent("swap_part_1", "0xbb", 300)
+    await journal.close()
+
+
+def test_split_swap_resumes_from_remaining_amount(tmp_path) -> None:
+    path = str(tmp_path / "journal.jsonl")
+    asyncio.run(write_interrupted_run(path))
+
+    journal = Journal(path)
+    journal.load()
+    wallet = journal.wallet(NETWORK, ADDRESS)
+
+    assert wallet.stages() == ["approve", "wrap", "swap_part_0", "swap_part_1", "swap"]
+    assert wallet.amount("swap_part_0") == 400
+    assert wallet.tx_hash("swap_part_1") == "0xbb"
+    # Неподтверждённая часть не входит в обменянную сумму, но её номер не переиспользуется
+    assert wallet.swap_parts() == (2, 400)
+
+
+async def write_cancelled_stage(path: str) -> None:
+    journal = Journal(path)
+    await journal.start()
+    wallet = journal.wallet(NETWORK, ADDRESS)
+    await wallet.record_sent("wrap", "0xaa")
+    await wallet.record_cancel("wrap", "0xcc")
+    await wallet.record_sent("approve", "0x01")
+    await wallet.record_cancel("approve", "0x02")
+    await wallet.record_sent("approve", "0x03")
+    await journal.close()
+
+
+def test_cancel_keeps_the_original_hash(tmp_path) -> None:
+    path = str(tmp_path / "journal.jsonl")
+    asyncio.run(write_cancelled_stage(path))
+
+    journal = Journal(path)
+    journal.load()
+    wallet = journal.wallet(NETWORK, ADDRESS)
+
+    assert (wallet.status("wrap"), wallet.tx_hash("wrap"), wallet.cancel_hash("wrap")) == ("sent", "0xaa", "0xcc")
+    # Повторная отправка этапа начинает запись заново
+    assert (wallet.tx_hash("approve"), wallet.cancel_hash("approve")) == ("0x03", None)
@@ -0,0 +1,102 @@
+from nonce_manager import NonceManager, nonce_manager
+from hexbytes import HexBytes
+from client import Client
+from typing import Any, List
+import asyncio
+
+CHAIN_ID = 990002
+ADDRESS = "0x" + "33" * 20
+
+
+class FakeEth:
+    """pending nonce адреса из сети; считает обращения"""
+
+    def __init__(self, pending: int) -> None:
+        self.pending = pending
+        self.calls = 0
+
+    async def get_transaction_count(self, address: str, block: str) -> int:
+        assert block == "pending"
+        self.calls += 1
+        return self.pending
+
+
+class FakeWeb3:
+    def __init__(self, pending: int) -> None:
+        self.eth = FakeEth(pending)
+
+
+def test_nonces_are_allocated_locally_in_sequence() -> None:
+    manager = NonceManager()
+    w3 = FakeWeb3(pending=7)
+
+    async def run() -> List[int]:
+        return list(await asyncio.gather(*(manager.next_nonce(w3, CHAIN_ID, ADDRESS) for _ in range(5))))
+
+    assert asyncio.run(run()) == [7, 8, 9, 10, 11]
+    assert w3.eth.calls == 1
+
+
+def test_resync_takes_pending_nonce_from_network() -> None:
+    manager = NonceManager()
+    w3 = FakeWeb3(pending=3)
+
+    async def run() -> List[int]:
+        first = await manager.next_nonce(w3, CHAIN_ID, ADDRESS)
+        w3.eth.pending = 10
+        await manager.resync(w3, CHAIN_ID, ADDRESS)
+        return [first, await manager.next_nonce(w3, CHAIN_ID, ADDRESS)]
+
+    assert asyncio.run(run()) == [3, 10]
+    assert NonceManager.is_nonce_error(ValueError({"code": -32000, "message": "nonce too low: next nonce 10"}))
+    assert not NonceManager.is_nonce_error(ValueError({"code": -32000, "message": "insufficient funds"}))
+
+
+def make_client(w3: FakeWeb3, errors: List[Exception]) -> Client:
+    client = Client(from_address=ADDRESS, to_address=ADDRESS, chain_id=CHAIN_ID, rpc_urls=["http://127.0.0.1:1"],
+                    private_key="0x" + "01" * 32, amount=0.1, router_address=ADDRESS, explorer_url="",
+                    address=ADDRESS)
+    client.w3 = w3
+
+    async def sign_and_broadcast(transaction: Any, on_signed: Any) -> HexBytes:
+        if errors:
+            raise errors.pop(0)
+        return HexBytes(transaction["nonce"].to_bytes(32, "big"))
+
+    client._sign_and_broadcast = sign_and_broadcast
+    return client
+
+
+def test_non_nonce_error_invalidates_cached_nonce() -> None:
+    w3 = FakeWeb3(pending=4)
+    client = make_client(w3, [ValueError({"code": -32000, "message": "insufficient funds"})])
+
+    async def run() -> int:
+        nonce = await client.get_nonce()
+        try:
+            await client.send_tx({"nonce": nonce})
+        except ValueError:
+            pass
+        # Следующий nonce снова берётся из сети, а не пропускает неотправленный
+        return await client.get_nonce()
+
+    try:
+        assert asyncio.run(run()) == 4
+        assert w3.eth.calls == 2
+    finally:
+        nonce_manager.invalidate(CHAIN_ID, ADDRESS)
+
+
+def test_nonce_error_resyncs_and_resends() -> None:
+    w3 = FakeWeb3(pending=4)
+    client = make_client(w3, [ValueError({"code": -32000, "message": "nonce too low"})])
+
+    async def run() -> HexBytes:
+        nonce = await client.get_nonce()
+        w3.eth.pending = 6
+        return await client.send_tx({"nonce": nonce})
+
+    try:
+        assert int.from_bytes(asyncio.run(run()), "big") == 6
+    finally:
+        nonce_manager.invalidate(CHAIN_ID, ADDRESS)
@@ -0,0 +1,65 @@
+from odos_scheduler import PRIORITY_ASSEMBLE, PRIORITY_QUOTE, OdosScheduler
+from typing import List
+import aiohttp
+import asyncio
+import time
+
+
+def rate_limited(retry_after: str) -> aiohttp.ClientResponseError:
+    return aiohttp.ClientResponseError(None, (), status=429, headers={"Retry-After": retry_after})
+
+
+def test_assemble_goes_out_before_queued_quotes() -> None:
+    scheduler = OdosScheduler(global_rps=20, proxy_rps=100)
+    # Пустой общий лимит: оба запроса оказываются в очереди одновременно
+    scheduler.global_bucket.tokens = 0
+    order: List[str] = []
+
+    async def request(name: str) -> str:
+        order.append(name)
+        return name
+
+    async def run() -> None:
+        await asyncio.gather(
+            scheduler.submit(PRIORITY_QUOTE, None, lambda: request("quote")),
+            scheduler.submit(PRIORITY_ASSEMBLE, None, lambda: request("assemble")),
+        )
+
+    asyncio.run(run())
+    assert order == ["assemble", "quote"]
+
+
+def test_retry_after_is_honoured() -> None:
+    scheduler = OdosScheduler(global_rps=100, proxy_rps=100, base_delay=0.01)
+    attempts: List[float] = []
+
+    async def request() -> str:
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise rate_limited("0.3")
+        return "ok"
+
+    assert asyncio.run(scheduler.submit(PRIORITY_QUOTE, None, request)) == "ok"
+    assert attempts[1] - attempts[0] >= 0.3
+    assert scheduler.retries == 1
+    assert scheduler._retry_delay(0, rate_limited("120")) == scheduler.max_delay
+
+
+def test_throttled_proxy_does_not_block_other_proxies() -> None:
+    scheduler = OdosScheduler(global_rps=100, proxy_rps=1)
+    scheduler._proxy_bucket("slow-proxy").tokens = 0
+    finished: List[str] = []
+
+    async def request(proxy: str) -> None:
+        finished.append(proxy)
+
+    async def run() -> float:
+        started = time.monotonic()
+        slow = asyncio.ensure_future(scheduler.submit(PRIORITY_QUOTE, "slow-proxy", lambda: request("slow-proxy")))
+        await scheduler.submit(PRIORITY_QUOTE, "fast-proxy", lambda: request("fast-proxy"))
+        elapsed = time.monotonic() - started
+        await slow
+        return elapsed
+
+    assert asyncio.run(run()) < 0.2
+    assert finished == ["fast-proxy", "slow-proxy"]
@@ -0,0 +1,26 @@
+from web3.exceptions import ContractLogicError
+from odos import is_execution_error
+import aiohttp
+import asyncio
+
+
+def test_node_refusals_are_execution_errors() -> None:
+    assert is_execution_error(ContractLogicError("execution reverted"))
+    assert is_execution_error(ValueError({"code": -32000, "message": "insufficient funds for transfer"}))
+    assert is_execution_error(ValueError({"code": 3, "message": "execution reverted", "data": "0x"}))
+    assert is_execution_error(ValueError({"code": -32000, "message": "gas required exceeds allowance (30000000)"}))
+    assert is_execution_error(ValueError({"code": -32000, "message": "intrinsic gas too low"}))
+
+
+def test_transport_and_internal_errors_are_not_execution_errors() -> None:
+    assert not is_execution_error(aiohttp.ClientConnectionError("connection reset"))
+    assert not is_execution_error(asyncio.TimeoutError())
+    assert not is_execution_error(ValueError("Нет ответа на eth_call в batch-ответе"))
+    assert not is_execution_error(IndexError("pop from empty list"))
+
+
+def test_node_limits_are_not_execution_errors() -> None:
+    assert not is_execution_error(ValueError({"code": -32005, "message": "Too many requests"}))
+    assert not is_execution_error(ValueError({"code": -32029, "message": "rate limit exceeded"}))
+    assert not is_execution_error(ValueError({"code": 429, "message": "Too Many Requests"}))
+    assert not is_execution_error(ValueError({"code": -32603, "message": "internal error"}))
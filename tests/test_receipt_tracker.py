@@ -0,0 +1,54 @@
+from receipt_tracker import ReceiptTracker
+from web3.exceptions import TransactionNotFound
+from hexbytes import HexBytes
+import asyncio
+import time
+
+TX_HASH = HexBytes("0x" + "ab" * 32)
+INCLUDED_IN_BLOCK = 3
+
+
+class FakeEth:
+    """Каждый опрос блока даёт новый блок; квитанция после включения сначала не находится failures раз"""
+
+    def __init__(self, failures: int) -> None:
+        self.block = 0
+        self.failures = failures
+
+    @property
+    async def block_number(self) -> int:
+        self.block += 1
+        return self.block
+
+    async def get_block(self, number: int) -> dict:
+        return {"transactions": [TX_HASH] if number == INCLUDED_IN_BLOCK else []}
+
+    async def get_transaction_receipt(self, tx_hash: HexBytes) -> dict:
+        if self.block < INCLUDED_IN_BLOCK:
+            raise TransactionNotFound("ещё не в блоке")
+        if self.failures:
+            self.failures -= 1
+            raise TransactionNotFound("узел отстал")
+        return {"transactionHash": tx_hash, "status": 1}
+
+
+class FakeWeb3:
+    def __init__(self, failures: int) -> None:
+        self.eth = FakeEth(failures)
+
+
+async def wait_receipt(failures: int) -> float:
+    tracker = ReceiptTracker(FakeWeb3(failures), chain_id=990001)
+    tracker.block_time = 0.5
+    started = time.monotonic()
+    receipt = await tracker.wait(TX_HASH, timeout=5)
+    assert receipt["status"] == 1
+    return time.monotonic() - started
+
+
+def test_receipt_found_in_included_block() -> None:
+    assert asyncio.run(wait_receipt(failures=0)) < 2
+
+
+def test_failed_receipt_lookup_is_retried_on_next_poll() -> None:
+    assert asyncio.run(wait_receipt(failures=2)) < 3
@@ -0,0 +1,103 @@
+from web3.exceptions import TransactionNotFound
+from odos import Odos, SwapError
+from journal import Journal
+from web3.datastructures import AttributeDict
+from hexbytes import HexBytes
+from typing import Any, Optional
+import asyncio
+
+TX_HASH = "0x" + "cd" * 32
+CANCEL_HASH = "0x" + "ef" * 32
+ADDRESS = "0x" + "22" * 20
+
+
+class FakeEth:
+    """Узел, который знает транзакцию (или нет) и отдаёт подтверждённый nonce кошелька"""
+
+    def __init__(self, tx: Optional[dict], confirmed_nonce: int) -> None:
+        self.tx = tx
+        self.confirmed_nonce = confirmed_nonce
+
+    async def get_transaction(self, tx_hash: str) -> dict:
+        if self.tx is None:
+            raise TransactionNotFound("не найдена")
+        return self.tx
+
+    async def get_transaction_count(self, address: str, block: str) -> int:
+        assert block == "latest"
+        return self.confirmed_nonce
+
+
+class FakeW3:
+    def __init__(self, eth: FakeEth) -> None:
+        self.eth = eth
+
+
+class FakeClient:
+    """Квитанция есть только у включённой транзакции (по умолчанию ни у одной), отправка отклоняется узлом"""
+
+    def __init__(self, eth: FakeEth, mined: Optional[str] = None) -> None:
+        self.w3 = FakeW3(eth)
+        self.address = ADDRESS
+        self.mined = mined
+
+    async def wait_receipt(self, tx_hash: str, timeout: float = 120) -> Any:
+        if tx_hash != self.mined:
+            await asyncio.sleep(0.1)
+            raise asyncio.TimeoutError()
+        return AttributeDict({"transactionHash": HexBytes(tx_hash), "status": 1})
+
+    async def send_tx(self, tx: Any, on_signed: Any) -> Any:
+        await on_signed(HexBytes(TX_HASH))
+        raise ValueError({"code": -32000, "message": "insufficient funds for gas * price + value"})
+
+
+def make_odos(tmp_path, tx: Optional[dict], confirmed_nonce: int = 5, mined: Optional[str] = None,
+              cancelled: bool = False) -> Odos:
+    wallet = Journal(str(tmp_path / "journal.jsonl")).wallet("arbitrum", ADDRESS)
+    wallet.record("wrap", "sent", TX_HASH)
+    if cancelled:
+        wallet.record("wrap", "sent", cancel_hash=CANCEL_HASH)
+    return Odos(FakeClient(FakeEth(tx, confirmed_nonce), mined), journal=wallet)
+
+
+def test_pending_journal_tx_is_not_resent(tmp_path) -> None:
+    odos = make_odos(tmp_path, {"nonce": 5, "blockNumber": None})
+
+    try:
+        asyncio.run(odos.resume_pending())
+    except SwapError:
+        pass
+    else:
+        raise AssertionError("кошелёк с транзакцией в мемпуле должен быть пропущен")
+    assert odos.journal.status("wrap") == "sent"
+
+
+def test_unknown_or_replaced_journal_tx_is_redone(tmp_path) -> None:
+    for tx in (None, {"nonce": 4, "blockNumber": None}):
+        odos = make_odos(tmp_path, tx)
+        asyncio.run(odos.resume_pending())
+        assert odos.journal.status("wrap") == "lost"
+
+
+def test_rejected_broadcast_is_journaled_as_unsent(tmp_path) -> None:
+    odos = make_odos(tmp_path, None)
+
+    try:
+        asyncio.run(odos.send_stage("approve", {}))
+    except ValueError:
+        pass
+    assert odos.journal.status("approve") == "unsent"
+    assert odos.transactions == []
+    assert odos.journal.status("wrap") == "sent"
+
+
+def test_cancelled_stage_resolves_to_the_included_tx(tmp_path) -> None:
+    odos = make_odos(tmp_path, None, mined=TX_HASH, cancelled=True)
+    asyncio.run(odos.resume_pending())
+    assert odos.journal.status("wrap") == "confirmed"
+
+    odos = make_odos(tmp_path, None, mined=CANCEL_HASH, cancelled=True)
+    asyncio.run(odos.resume_pending())
+    assert odos.journal.status("wrap") == "cancelled"
+    assert odos.journal.tx_hash("wrap") == TX_HASH
@@ -0,0 +1,42 @@
+from route_planner import RouteSearch, candidates, choose, split_amount
+
+MAIN = "0x" + "aa" * 20
+ALTERNATE = "0x" + "bb" * 20
+
+
+def test_candidates_cover_splits_and_output_tokens() -> None:
+    route_candidates = candidates(10, RouteSearch((4, 1, 2, 2), [MAIN, ALTERNATE]))
+
+    assert [(candidate.to_address, candidate.parts) for candidate in route_candidates] == [
+        (MAIN, 1), (MAIN, 2), (MAIN, 4), (ALTERNATE, 1), (ALTERNATE, 2), (ALTERNATE, 4)]
+    assert split_amount(10, 4) == [2, 2, 2, 4]
+    assert all(sum(candidate.amounts) == 10 for candidate in route_candidates)
+
+
+def test_candidates_skip_splits_larger_than_the_amount() -> None:
+    assert [candidate.parts for candidate in candidates(3, RouteSearch((1, 2, 4), [MAIN]))] == [1, 2]
+
+
+def test_choose_picks_best_output_net_of_gas() -> None:
+    route_candidates = candidates(10, RouteSearch((1, 2), [MAIN, ALTERNATE]))
+    quotes = [
+        {"outValues": [100.0], "gasEstimateValue": 1.0},
+        # Больший выход, но газ за каждую часть съедает выигрыш
+        {"outValues": [50.4], "gasEstimateValue": 1.0},
+        {"netOutValue": 98.5},
+        {"netOutValue": 49.0},
+    ]
+
+    plan = choose(route_candidates, quotes)
+
+    assert (plan.to_address, plan.parts, plan.net_value) == (MAIN, 1, 99.0)
+    assert plan.quote is quotes[0]
+
+
+def test_choose_skips_errors_and_quotes_without_usd_value() -> None:
+    route_candidates = candidates(10, RouteSearch((1, 2), [MAIN]))
+
+    plan = choose(route_candidates, [RuntimeError("429"), {"outValues": [60.0], "gasEstimateValue": 0.5}])
+    assert (plan.parts, plan.net_value) == (2, 119.0)
+
+    assert choose(route_candidates, [ValueError("timeout"), {"outAmounts": ["1000"]}]) is None
@@ -0,0 +1,87 @@
+from typing import Any, Dict
+from rpc_pool import Endpoint, RpcPool, endpoint_label
+from proxy_pool import ProxyPool
+import rpc_pool
+import aiohttp
+import asyncio
+
+
+# Пул с подменённым _post: поведение каждого узла задаётся (задержка, ошибка или ответ)
+def make_pool(behaviour: Dict[str, Any], hedge_delay: float = 0.05) -> RpcPool:
+    pool = RpcPool(list(behaviour))
+    for endpoint in pool.endpoints:
+        endpoint.hedge_delay = lambda: hedge_delay
+
+    async def post(endpoint: Endpoint, payload: Any) -> Any:
+        delay, result = behaviour[endpoint.url]
+        await asyncio.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    pool._post = post
+    return pool
+
+
+def test_slow_backup_after_primary_failure_is_awaited() -> None:
+    pool = make_pool({
+        "primary": (0.0, ConnectionError("503")),
+        "backup": (0.3, {"result": "0x1"}),
+    })
+    pool.ranked = lambda: pool.endpoints
+
+    assert asyncio.run(pool.request({"method": "eth_blockNumber"})) == {"result": "0x1"}
+
+
+def test_hedge_goes_to_backup_when_primary_is_slow() -> None:
+    pool = make_pool({
+        "primary": (1.0, {"result": "slow"}),
+        "backup": (0.0, {"result": "fast"}),
+    })
+    pool.ranked = lambda: pool.endpoints
+
+    assert asyncio.run(pool.request({"method": "eth_blockNumber"})) == {"result": "fast"}
+
+
+def test_last_error_is_raised_when_all_endpoints_fail() -> None:
+    pool = make_pool({
+        "primary": (0.0, ConnectionError("first")),
+        "backup": (0.1, ConnectionError("second")),
+    })
+    pool.ranked = lambda: pool.endpoints
+
+    try:
+        asyncio.run(pool.request({"method": "eth_blockNumber"}))
+    except ConnectionError as e:
+        assert str(e) == "second"
+    else:
+        raise AssertionError("ожидалась ошибка последнего узла")
+
+
+def test_connection_errors_are_reported_to_proxy_pool(monkeypatch) -> None:
+    proxy_pool = ProxyPool(["user:pass@proxy:8080"])
+    pool = RpcPool(["primary"], proxy="user:pass@proxy:8080", proxy_pool=proxy_pool)
+    responses = [aiohttp.ClientConnectionError("proxy refused"), {"result": "0x1"}]
+
+    async def post_json(*args: Any, **kwargs: Any) -> Any:
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(rpc_pool, "post_json", post_json)
+    state = proxy_pool.states["user:pass@proxy:8080"]
+
+    try:
+        asyncio.run(pool.request({"method": "eth_blockNumber"}))
+    except aiohttp.ClientConnectionError:
+        pass
+    assert (state.requests, state.errors) == (1, 1)
+
+    assert asyncio.run(pool.request({"method": "eth_blockNumber"})) == {"result": "0x1"}
+    assert (state.requests, state.errors, state.consecutive_failures) == (2, 1, 0)
+
+
+def test_endpoint_label_drops_api_key_from_url() -> None:
+    assert endpoint_label("https://arb-mainnet.g.alchemy.com/v2/SECRET?token=1") == "arb-mainnet.g.alchemy.com"
+    assert endpoint_label("http://127.0.0.1:8545/SECRET") == "127.0.0.1:8545"
@@ -0,0 +1,78 @@
+from typing import Dict, Iterator, List, NamedTuple
+from termcolor import cprint
+import hashlib
+import os
+
+ADDRESS_CACHE_FILE = "addresses.cache"
+
+
+class Wallet(NamedTuple):
+    index: int
+    private_key: str
+    address: str
+
+
+class WalletStore:
+    """Ключи и адреса кошельков в двух списках; объект Wallet создаётся только по запросу"""
+
+    __slots__ = ("private_keys", "addresses")
+
+    def __init__(self, private_keys: List[str], addresses: List[str]) -> None:
+        self.private_keys = private_keys
+        self.addresses = addresses
+
+    def __len__(self) -> int:
+        return len(self.private_keys)
+
+    def __getitem__(self, index: int) -> Wallet:
+        return Wallet(index, self.private_keys[index], self.addresses[index])
+
+    def __iter__(self) -> Iterator[Wallet]:
+        for index in range(len(self.private_keys)):
+            yield self[index]
+
+    # Адреса берутся из кэша на диске; вычисляются только ключи, которых там нет
+    @classmethod
+    def load(cls, private_keys: List[str], cache_path: str = ADDRESS_CACHE_FILE) -> "WalletStore":
+        cache = _read_cache(cache_path)
+        digests = [_digest(private_key) for private_key in private_keys]
+        missing = [index for index, digest in enumerate(digests) if digest not in cache]
+
+        if missing:
+            if len(missing) > 1000:
+                cprint(f"🔑 Вычисляем адреса {len(missing)} кошельков, результат сохранится в {cache_path}...",
+                       "light_cyan")
+            # eth_account нужен только для ключей без кэша
+            from eth_account import Account
+            new_entries = {digests[index]: Account.from_key(private_keys[index]).address for index in missing}
+            cache.update(new_entries)
+            _append_cache(cache_path, new_entries)
+
+        return cls(private_keys, [cache[digest] for digest in digests])
+
+
+# В кэше лежит хэш ключа, а не сам ключ
+def _digest(private_key: str) -> str:
+    return hashlib.sha256(private_key.lower().removeprefix("0x").encode()).hexdigest()[:32]
+
+
+def _read_cache(path: str) -> Dict[str, str]:
+    if not path or not os.path.exists(path):
+        return {}
+    cache = {}
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 2:
+                cache[parts[0]] = parts[1]
+    return cache
+
+
+def _append_cache(path: str, entries: Dict[str, str]) -> None:
+    if not path:
+        return
+    try:
+        with open(path, "a", encoding="utf-8") as file:
+            file.writelines(f"{digest} {address}\n" for digest, address in entries.items())
+    except OSError as e:
+        cprint(f"⚠️ Не удалось сохранить кэш адресов: {e}", "light_yellow")